@@ -8,6 +8,13 @@ UnionType = getattr(types, "UnionType", Union)
 NoneType = type(None)
 
 
+def _null_first(value: Any) -> tuple[bool, Any]:
+    """Sort key putting NULLs before any value, as SQL does"""
+    if value is None:
+        return (False, 0)
+    return (True, value)
+
+
 class BaseBackend(abc.ABC):
 
     @abc.abstractmethod
@@ -25,8 +32,12 @@ class BaseBackend(abc.ABC):
         params: dict,
         query_fields: list | None = None,
         _limit: int | None = None,
+        order_by: list[str] | None = None,
+        after: tuple | None = None,
     ) -> list[Any]:
-        """Get various items from the database"""
+        """Get various items from the database.
+        `order_by` is a list of column names, prefixed with `-` for descending.
+        `after` holds the `order_by` values of the last row of the previous page"""
 
     def sql_select_build(
         self,
@@ -34,15 +45,93 @@ class BaseBackend(abc.ABC):
         filter_fields: dict,
         query_fields: list | None = None,
         _limit: int | None = None,
+        order_by: list[str] | None = None,
+        after: tuple | None = None,
     ):
         query_fields_str = "*"
         if query_fields:
             query_fields_str = ", ".join(query_fields)
         filter_str = self._get_where_sql(filter_fields)
+        if after is not None:
+            seek_str = self._get_seek_sql(order_by or [], after)
+            if filter_str:
+                filter_str = f"{filter_str} AND {seek_str}"
+            else:
+                filter_str = f" WHERE {seek_str}"
+        order_str = self._get_order_by_sql(order_by)
         limit_str = ""
         if _limit is not None:
             limit_str = f" LIMIT {_limit}"
-        return f"SELECT {query_fields_str} FROM '{table_name}'{filter_str}{limit_str}"
+        return f"SELECT {query_fields_str} FROM '{table_name}'{filter_str}{order_str}{limit_str}"  # noqa: E501
+
+    def _is_seek_descending(self, order_by: list[str], after: tuple) -> bool:
+        if len(order_by) != len(after):
+            raise ValueError(
+                "A value of the previous row is needed per order_by column"
+            )
+        directions = {field.startswith("-") for field in order_by}
+        if len(directions) != 1:
+            raise ValueError("Keyset pagination needs a single ordering direction")
+        return directions.pop()
+
+    def _get_seek_sql(self, order_by: list[str], after: tuple) -> str:
+        operator = "<" if self._is_seek_descending(order_by, after) else ">"
+        columns = ", ".join(field.removeprefix("-") for field in order_by)
+        placeholders = ", ".join(f":{name}" for name in self._get_seek_params(after))
+        return f"({columns}) {operator} ({placeholders})"
+
+    def _get_seek_params(self, after: tuple) -> dict:
+        return {f"_after_{index}": value for index, value in enumerate(after)}
+
+    def _get_order_by_sql(self, order_by: list[str] | None) -> str:
+        if not order_by:
+            return ""
+        columns: list[str] = []
+        for field in order_by:
+            if field.startswith("-"):
+                columns.append(f"{field[1:]} DESC")
+            else:
+                columns.append(field)
+        return f" ORDER BY {', '.join(columns)}"
+
+    def search(
+        self,
+        table_name: str,
+        query: str,
+        query_fields: list[str],
+        rank: bool = True,
+        _limit: int | None = None,
+    ) -> list[dict]:
+        """Full-text search the rows of `table_name`. Ranked rows are returned
+        best first, with their score in `_rank`"""
+        raise NotImplementedError("Full-text search is not supported by this backend")
+
+    def install_change_tracking(self, table_name: str, pk_column: str) -> None:
+        """Log every insert, update and delete of `table_name` in the changelog"""
+        raise NotImplementedError("Change tracking is not supported by this backend")
+
+    def get_changes(
+        self,
+        since: int,
+        table_names: list[str] | None = None,
+        _limit: int | None = None,
+    ) -> list[tuple]:
+        """Get the (seq, table name, pk, operation) changelog entries after
+        `since`, oldest first"""
+        raise NotImplementedError("Change tracking is not supported by this backend")
+
+    def get_last_change_seq(self) -> int:
+        raise NotImplementedError("Change tracking is not supported by this backend")
+
+    def get_change_version(self) -> Any:
+        """Return a value that differs whenever the database may have changed,
+        cheap enough to poll"""
+        raise NotImplementedError("Change tracking is not supported by this backend")
+
+    def compact_changelog(self, before_seq: int | None = None) -> int:
+        """Delete changelog entries superseded by a later change of the same
+        row, and all entries up to `before_seq`. Return the entries deleted"""
+        raise NotImplementedError("Change tracking is not supported by this backend")
 
     @abc.abstractmethod
     def sql_create_db(self, table_name: str, fields: dict[str, FieldInfo]):
@@ -78,19 +167,72 @@ class BaseBackend(abc.ABC):
     def is_union_type(self, type: type[Any]) -> bool:
         return type is UnionType or type is Union
 
+    def register_table(self, table_name: str, fields: dict[str, FieldInfo]) -> None:
+        """Prepare reads and writes of `table_name` for the model `fields`.
+        Called before every model operation, so it must be cheap when the
+        fields didn't change"""
+
     @abc.abstractmethod
     def insert_item(self, table_name: str, params: dict) -> tuple | None:
         """Get SQL insert statement, and execute it in the database"""
 
-    def sql_insert_row(self, table_name: str, column_names: list[str]) -> str:
+    def sql_insert_row(
+        self, table_name: str, column_names: list[str], returning: bool = True
+    ) -> str:
         column_names_str = ", ".join(column_names)
-        named_placeholders_list = (f":{placeholder}" for placeholder in column_names)
-        named_placeholders = ", ".join(named_placeholders_list)
+        placeholders = ", ".join("?" for _ in column_names)
         sql: str = (
-            f"INSERT INTO '{table_name}'({column_names_str}) VALUES({named_placeholders}) RETURNING {column_names_str}"  # noqa: E501
+            f"INSERT INTO '{table_name}'({column_names_str}) VALUES({placeholders})"
         )
+        if returning:
+            sql = f"{sql} RETURNING {column_names_str}"
         return sql
 
+    @abc.abstractmethod
+    def write_many(
+        self,
+        table_name: str,
+        inserts: list[dict],
+        updates: list[tuple[dict, dict]],
+    ) -> list[tuple[dict, dict]]:
+        """Insert `inserts` and apply `updates`, pairs of values and filters,
+        in a single transaction. Return the updates that matched no row"""
+
+    @abc.abstractmethod
+    def upsert_items(
+        self,
+        table_name: str,
+        rows: list[dict],
+        conflict_fields: list[str],
+        update_fields: list[str],
+    ) -> list[tuple]:
+        """Insert `rows`, updating `update_fields` on rows that conflict on
+        `conflict_fields`. Return the rows written, skipped rows are left out"""
+
+    def sql_upsert_rows(
+        self,
+        table_name: str,
+        column_names: list[str],
+        row_count: int,
+        conflict_fields: list[str],
+        update_fields: list[str],
+    ) -> str:
+        column_names_str = ", ".join(column_names)
+        row_placeholders = f"({', '.join('?' for _ in column_names)})"
+        values = ", ".join(row_placeholders for _ in range(row_count))
+        conflict_str = ", ".join(conflict_fields)
+        if update_fields:
+            set_str = ", ".join(
+                f"{column} = excluded.{column}" for column in update_fields
+            )
+            action = f"DO UPDATE SET {set_str}"
+        else:
+            action = "DO NOTHING"
+        return (
+            f"INSERT INTO '{table_name}'({column_names_str}) VALUES {values} "
+            f"ON CONFLICT({conflict_str}) {action} RETURNING {column_names_str}"
+        )
+
     @abc.abstractmethod
     def update_item(self, table_name: str, params: dict, filters: dict) -> int:
         """Get SQL update statement, and execute it in the database
@@ -0,0 +1,195 @@
+import datetime
+import decimal
+import enum
+import json
+import uuid
+from typing import Any, Callable, NamedTuple, Sequence, get_origin
+
+from pydantic import BaseModel
+from pydantic_core import to_json
+
+Encoder = Callable[[Any], Any]
+Decoder = Callable[[Any], Any]
+
+
+class ColumnType(NamedTuple):
+    """How values of a Python type are stored: the column affinity, and the
+    functions converting values to and from the database. `None` values are
+    never passed to them"""
+
+    affinity: str
+    encoder: Encoder | None = None
+    decoder: Decoder | None = None
+
+
+ColumnTypeFactory = Callable[[Any], ColumnType]
+
+
+def _encode_json(value: Any) -> str:
+    return to_json(value).decode()
+
+
+def _enum_column_type(enum_cls: type[enum.Enum]) -> ColumnType:
+    is_integer = all(isinstance(member.value, int) for member in enum_cls)
+    return ColumnType(
+        "INTEGER" if is_integer else "TEXT",
+        encoder=lambda member: member.value,
+        decoder=enum_cls,
+    )
+
+
+JSON_COLUMN = ColumnType("TEXT", encoder=_encode_json, decoder=json.loads)
+
+default_column_types: dict[Any, ColumnType | ColumnTypeFactory] = {
+    str: ColumnType("TEXT"),
+    int: ColumnType("INTEGER"),
+    float: ColumnType("REAL"),
+    bool: ColumnType("INTEGER", encoder=int, decoder=bool),
+    bytes: ColumnType("BLOB"),
+    decimal.Decimal: ColumnType(
+        "NUMERIC", encoder=str, decoder=lambda value: decimal.Decimal(str(value))
+    ),
+    datetime.datetime: ColumnType(
+        "TEXT",
+        encoder=datetime.datetime.isoformat,
+        decoder=datetime.datetime.fromisoformat,
+    ),
+    datetime.date: ColumnType(
+        "TEXT", encoder=datetime.date.isoformat, decoder=datetime.date.fromisoformat
+    ),
+    datetime.time: ColumnType(
+        "TEXT", encoder=datetime.time.isoformat, decoder=datetime.time.fromisoformat
+    ),
+    uuid.UUID: ColumnType("TEXT", encoder=str, decoder=uuid.UUID),
+    enum.Enum: _enum_column_type,
+    dict: JSON_COLUMN,
+    list: JSON_COLUMN,
+    BaseModel: JSON_COLUMN,
+}
+
+
+class TypeRegistry:
+    """Map Python types to `ColumnType`s. Lookups fall back to the generic
+    origin (`list[int]` to `list`) and then to the base classes of the type,
+    so registering `Enum` covers every enum. Entries can be factories called
+    with the concrete type. `version` changes on every registration, so codecs
+    built from the registry know when to be rebuilt"""
+
+    def __init__(
+        self,
+        column_types: dict[Any, ColumnType | ColumnTypeFactory] | None = None,
+        default: ColumnType = ColumnType("TEXT"),
+    ):
+        self._column_types = dict(column_types or {})
+        self.default = default
+        self.version = 0
+
+    def register(
+        self,
+        python_type: Any,
+        column_type: ColumnType | ColumnTypeFactory | None = None,
+        *,
+        affinity: str = "TEXT",
+        encoder: Encoder | None = None,
+        decoder: Decoder | None = None,
+    ) -> None:
+        if column_type is None:
+            column_type = ColumnType(affinity, encoder, decoder)
+        self._column_types[python_type] = column_type
+        self.version += 1
+
+    def get(self, python_type: Any) -> ColumnType:
+        entry = self._column_types.get(python_type)
+        if entry is None:
+            origin = get_origin(python_type)
+            if origin is not None:
+                entry = self._column_types.get(origin)
+            elif isinstance(python_type, type):
+                for base in python_type.__mro__[1:]:
+                    entry = self._column_types.get(base)
+                    if entry is not None:
+                        break
+        if entry is None:
+            return self.default
+        if isinstance(entry, ColumnType):
+            return entry
+        return entry(python_type)
+
+
+class TableCodec:
+    """Encoders and decoders of the columns of a table, compiled once so rows
+    are converted positionally without per-value type checks"""
+
+    __slots__ = ("columns", "encoders", "decoders", "encoder_map", "decoder_map")
+
+    def __init__(
+        self,
+        columns: Sequence[str],
+        encoders: Sequence[Encoder | None],
+        decoders: Sequence[Decoder | None],
+    ):
+        self.columns = tuple(columns)
+        self.encoders = tuple(encoders)
+        self.decoders = tuple(decoders)
+        self.encoder_map = {
+            column: encoder
+            for column, encoder in zip(self.columns, self.encoders)
+            if encoder is not None
+        }
+        self.decoder_map = {
+            column: decoder
+            for column, decoder in zip(self.columns, self.decoders)
+            if decoder is not None
+        }
+
+    @classmethod
+    def from_column_types(
+        cls, columns: Sequence[str], column_types: Sequence[ColumnType]
+    ) -> "TableCodec":
+        return cls(
+            columns,
+            [column_type.encoder for column_type in column_types],
+            [column_type.decoder for column_type in column_types],
+        )
+
+    def encode_values(self, values: list[Any]) -> list[Any]:
+        """Encode a full row given in column order"""
+        if not self.encoder_map:
+            return values
+        return [
+            value if encoder is None or value is None else encoder(value)
+            for encoder, value in zip(self.encoders, values)
+        ]
+
+    def encode(self, params: dict) -> dict:
+        """Encode the named values of some of the columns"""
+        encoded = params
+        for column, encoder in self.encoder_map.items():
+            value = params.get(column)
+            if value is not None:
+                if encoded is params:
+                    encoded = params.copy()
+                encoded[column] = encoder(value)
+        return encoded
+
+    def decode_rows(self, columns: Sequence[str], rows: list[Any]) -> list[Any]:
+        if tuple(columns) == self.columns:
+            decoders: Sequence[Decoder | None] = self.decoders
+        else:
+            decoders = [self.decoder_map.get(column) for column in columns]
+        active = [
+            (index, decoder)
+            for index, decoder in enumerate(decoders)
+            if decoder is not None
+        ]
+        if not active:
+            return rows
+        decoded_rows = []
+        for row in rows:
+            values = list(row)
+            for index, decoder in active:
+                value = values[index]
+                if value is not None:
+                    values[index] = decoder(value)
+            decoded_rows.append(tuple(values))
+        return decoded_rows
@@ -0,0 +1,453 @@
+import contextlib
+import logging
+import math
+import threading
+from typing import Any, Hashable, Iterator, get_origin
+
+from pydantic.fields import FieldInfo
+from pydantic_core import to_json
+
+from pyorm.exceptions import IntegrityError
+from pyorm.utils import is_field_indexed, is_field_primary_key, is_field_unique
+
+from .base import BaseBackend, _null_first
+from .column_types import TableCodec, TypeRegistry, default_column_types
+
+logger = logging.getLogger("memory_backend")
+
+
+def _index_key(value: Any) -> Hashable:
+    try:
+        hash(value)
+    except TypeError:
+        return to_json(value)
+    return value
+
+
+def _numeric_value(value: Any) -> Any:
+    """Convert a value as a NUMERIC column does: text holding a number becomes
+    an integer when that is exact, else a float"""
+    if isinstance(value, str):
+        try:
+            return int(value)
+        except ValueError:
+            pass
+        try:
+            number = float(value)
+        except ValueError:
+            return value
+        if not math.isfinite(number):
+            return value
+        value = number
+    if isinstance(value, float) and value.is_integer() and abs(value) < 2**63:
+        return int(value)
+    return value
+
+
+def _is_row_after(values: list[Any], after: tuple, descending: bool) -> bool:
+    """Compare row values as SQL does: the first unequal pair decides, and a
+    NULL met before it makes the comparison NULL, so not true"""
+    for value, bound in zip(values, after):
+        if value is None or bound is None:
+            return False
+        if value != bound:
+            return value < bound if descending else value > bound
+    return False
+
+
+class MemoryTable:
+    """Rows of a table keyed by rowid, with a hash index per primary key,
+    unique and indexed column.
+
+    Values are kept encoded by `codec`, as SQLite would store them. Row dicts
+    are replaced on update and never modified, so copies of the table can
+    share them. While `journal` is set, the previous version of every row
+    written is recorded in it, so the writes can be rolled back.
+    """
+
+    def __init__(
+        self,
+        columns: list[str],
+        pk_column: str | None,
+        auto_increment: bool,
+        unique_columns: set[str],
+        indexed_columns: set[str],
+        not_null_columns: set[str],
+    ):
+        self.columns = columns
+        self.pk_column = pk_column
+        self.auto_increment = auto_increment
+        self.unique_columns = unique_columns
+        self.not_null_columns = not_null_columns
+        self.rows: dict[int, dict[str, Any]] = {}
+        self.indexes: dict[str, dict[Hashable, set[int]]] = {
+            column: {} for column in unique_columns | indexed_columns
+        }
+        self.next_rowid = 1
+        self.next_pk = 1
+        self.journal: list[tuple[int, dict[str, Any] | None]] | None = None
+        self.fields: dict[str, FieldInfo] = {}
+        self.codec_version = -1
+        self.codec = TableCodec(columns, [None] * len(columns), [None] * len(columns))
+        self.numeric_columns: set[str] = set()
+
+    def encode(self, params: dict[str, Any]) -> dict[str, Any]:
+        encoded = self.codec.encode(params)
+        for column in self.numeric_columns.intersection(encoded):
+            if encoded is params:
+                encoded = params.copy()
+            encoded[column] = _numeric_value(encoded[column])
+        return encoded
+
+    def decode(self, columns: list[str], rows: list[tuple]) -> list[tuple]:
+        return self.codec.decode_rows(columns, rows)
+
+    def copy(self) -> "MemoryTable":
+        table = object.__new__(MemoryTable)
+        table.__dict__.update(self.__dict__)
+        table.rows = self.rows.copy()
+        table.indexes = {
+            column: {key: rowids.copy() for key, rowids in index.items()}
+            for column, index in self.indexes.items()
+        }
+        table.journal = None
+        return table
+
+    def _put(self, rowid: int, row: dict[str, Any]) -> None:
+        self.rows[rowid] = row
+        for column, index in self.indexes.items():
+            index.setdefault(_index_key(row[column]), set()).add(rowid)
+
+    def _remove(self, rowid: int) -> dict[str, Any]:
+        row = self.rows.pop(rowid)
+        for column, index in self.indexes.items():
+            key = _index_key(row[column])
+            rowids = index[key]
+            rowids.discard(rowid)
+            if not rowids:
+                del index[key]
+        return row
+
+    def _check(self, row: dict[str, Any], rowid: int | None = None) -> None:
+        for column in self.not_null_columns:
+            if row[column] is None:
+                raise IntegrityError(f"NOT NULL constraint failed: {column}")
+        for column in self.unique_columns:
+            value = row[column]
+            # As in SQL, NULLs never conflict
+            if value is None:
+                continue
+            rowids = self.indexes[column].get(_index_key(value), ())
+            if any(other != rowid for other in rowids):
+                raise IntegrityError(f"UNIQUE constraint failed: {column}")
+
+    def _track_pk(self, row: dict[str, Any]) -> None:
+        if self.auto_increment:
+            pk = row[self.pk_column]  # type: ignore[index]
+            if isinstance(pk, int) and pk >= self.next_pk:
+                self.next_pk = pk + 1
+
+    def insert(self, params: dict[str, Any]) -> dict[str, Any]:
+        row = {column: params.get(column) for column in self.columns}
+        if self.auto_increment and row[self.pk_column] is None:  # type: ignore[index]
+            row[self.pk_column] = self.next_pk  # type: ignore[index]
+        self._check(row)
+        self._track_pk(row)
+        rowid = self.next_rowid
+        self.next_rowid += 1
+        self._put(rowid, row)
+        if self.journal is not None:
+            self.journal.append((rowid, None))
+        return row
+
+    def update(self, rowid: int, params: dict[str, Any]) -> dict[str, Any]:
+        old_row = self.rows[rowid]
+        row = old_row | params
+        self._check(row, rowid)
+        self._track_pk(row)
+        self._remove(rowid)
+        self._put(rowid, row)
+        if self.journal is not None:
+            self.journal.append((rowid, old_row))
+        return row
+
+    def delete(self, rowid: int) -> None:
+        row = self._remove(rowid)
+        if self.journal is not None:
+            self.journal.append((rowid, row))
+
+    def rollback(self, journal: list[tuple[int, dict[str, Any] | None]]) -> None:
+        for rowid, old_row in reversed(journal):
+            if rowid in self.rows:
+                self._remove(rowid)
+            if old_row is not None:
+                self._put(rowid, old_row)
+
+    def find(self, filters: dict[str, Any]) -> list[int]:
+        """Rowids of the rows equal to `filters`, `None` matching NULLs. The
+        smallest index bucket of the filtered columns narrows the scan"""
+        candidates: Any = None
+        for column, value in filters.items():
+            index = self.indexes.get(column)
+            if index is not None:
+                rowids = index.get(_index_key(value), ())
+                if candidates is None or len(rowids) < len(candidates):
+                    candidates = rowids
+        if candidates is None:
+            candidates = self.rows
+        rows = self.rows
+        return [
+            rowid
+            for rowid in candidates
+            if all(rows[rowid][column] == value for column, value in filters.items())
+        ]
+
+
+class InMemoryBackend(BaseBackend):
+    """Keep tables in Python dicts instead of a database, for tests and
+    ephemeral data. Behaves like `SQLiteBackend` for model operations, without
+    SQL: constraints are checked on writes, integer primary keys autoincrement,
+    and `snapshot()`/`restore()` save and reset the whole database cheaply.
+
+    Values are encoded by `column_types` on writes and decoded on reads, so
+    they compare, sort and round-trip as in SQLite, and rows don't share
+    mutable values with instances.
+    """
+
+    def __init__(self, *args, **kwargs):
+        logger.debug("Initializing InMemoryBackend")
+        self.column_types = TypeRegistry(default_column_types)
+        self.tables: dict[str, MemoryTable] = {}
+        self.lock = threading.RLock()
+
+    def get_connection(self) -> Any:
+        return self
+
+    def execute(self, sql: str, cursor: Any, params: dict | list | None = None) -> Any:
+        raise NotImplementedError("InMemoryBackend doesn't execute SQL")
+
+    def get_table(self, table_name: str) -> MemoryTable:
+        try:
+            return self.tables[table_name]
+        except KeyError:
+            raise ValueError(f"No such table: {table_name}") from None
+
+    @contextlib.contextmanager
+    def transaction(self, table: MemoryTable) -> Iterator[MemoryTable]:
+        """Roll back every write made to `table` in the block if it raises"""
+        with self.lock:
+            if table.journal is not None:
+                yield table
+                return
+            journal: list[tuple[int, dict[str, Any] | None]] = []
+            table.journal = journal
+            try:
+                yield table
+            except BaseException:
+                table.rollback(journal)
+                raise
+            finally:
+                table.journal = None
+
+    def snapshot(self) -> dict[str, MemoryTable]:
+        """Copy the current tables, sharing the row dicts"""
+        with self.lock:
+            return {name: table.copy() for name, table in self.tables.items()}
+
+    def restore(self, snapshot: dict[str, MemoryTable]) -> None:
+        """Reset the tables to a `snapshot()`, which can be restored again"""
+        with self.lock:
+            self.tables = {name: table.copy() for name, table in snapshot.items()}
+
+    def get_many(
+        self,
+        table_name: str,
+        params: dict,
+        query_fields: list | None = None,
+        _limit: int | None = None,
+        order_by: list[str] | None = None,
+        after: tuple | None = None,
+    ) -> list[Any]:
+        with self.lock:
+            table = self.get_table(table_name)
+            rows = [table.rows[rowid] for rowid in table.find(table.encode(params))]
+        if after is not None:
+            columns = [field.removeprefix("-") for field in order_by or []]
+            after_params = table.encode(dict(zip(columns, after)))
+            rows = self._seek(rows, order_by or [], tuple(after_params.values()))
+        if order_by:
+            # Stable sorts from the last key to the first sort by every key
+            for field in reversed(order_by):
+                column = field.removeprefix("-")
+                rows.sort(
+                    key=lambda row: _null_first(row[column]),
+                    reverse=field.startswith("-"),
+                )
+        if _limit is not None:
+            rows = rows[:_limit]
+        columns = query_fields or table.columns
+        values = table.decode(
+            columns, [tuple(row[column] for column in columns) for row in rows]
+        )
+        if query_fields:
+            return [dict(zip(query_fields, row)) for row in values]
+        return values
+
+    def _seek(
+        self, rows: list[dict[str, Any]], order_by: list[str], after: tuple
+    ) -> list[dict[str, Any]]:
+        descending = self._is_seek_descending(order_by, after)
+        columns = [field.removeprefix("-") for field in order_by]
+        return [
+            row
+            for row in rows
+            if _is_row_after([row[column] for column in columns], after, descending)
+        ]
+
+    def sql_create_db(self, table_name: str, fields: dict[str, FieldInfo]):
+        pk_column = None
+        auto_increment = False
+        unique_columns: set[str] = set()
+        indexed_columns: set[str] = set()
+        not_null_columns: set[str] = set()
+        for field_name, field in fields.items():
+            if is_field_primary_key(field):
+                pk_column = field_name
+                auto_increment = self.get_type_affinity(field) == "INTEGER"
+                unique_columns.add(field_name)
+            elif not self.is_nullable(field):
+                not_null_columns.add(field_name)
+            if is_field_unique(field):
+                unique_columns.add(field_name)
+            if is_field_indexed(field):
+                indexed_columns.add(field_name)
+        with self.lock:
+            if table_name in self.tables:
+                raise ValueError(f"Table {table_name} already exists")
+            self.tables[table_name] = MemoryTable(
+                list(fields),
+                pk_column,
+                auto_increment,
+                unique_columns,
+                indexed_columns,
+                not_null_columns,
+            )
+            self.register_table(table_name, fields)
+
+    def register_table(self, table_name: str, fields: dict[str, FieldInfo]) -> None:
+        table = self.tables.get(table_name)
+        version = self.column_types.version
+        if table is None or (table.fields is fields and table.codec_version == version):
+            return
+        column_types = [
+            self.column_types.get(self.get_field_type(field))
+            for field in fields.values()
+        ]
+        table.codec = TableCodec.from_column_types(list(fields), column_types)
+        table.numeric_columns = {
+            name
+            for name, column_type in zip(fields, column_types)
+            if column_type.affinity.upper() == "NUMERIC"
+        }
+        table.fields = fields
+        table.codec_version = version
+
+    def sql_drop_table(self, table_name: str) -> None:
+        logger.info("Dropping table %s", table_name)
+        with self.lock:
+            self.tables.pop(table_name, None)
+
+    def is_nullable(self, field: FieldInfo) -> bool:
+        origin = get_origin(field.annotation)
+        return origin is not None and self.is_union_type(origin)
+
+    def get_type_affinity(self, field: FieldInfo) -> str:
+        return self.column_types.get(self.get_field_type(field)).affinity
+
+    def get_column_definition(self, name: str, field: FieldInfo) -> str:
+        constraints = self.get_column_constraints(field)
+        return f"{name} {self.get_type_affinity(field)}{constraints}"
+
+    def get_column_constraints(self, field: FieldInfo) -> str:
+        constraints = ""
+        if is_field_primary_key(field):
+            constraints = f"{constraints} PRIMARY KEY"
+        elif not self.is_nullable(field):
+            constraints = f"{constraints} NOT NULL"
+        if is_field_unique(field) and not is_field_primary_key(field):
+            constraints = f"{constraints} UNIQUE"
+        return constraints
+
+    def insert_item(self, table_name: str, params: dict) -> tuple | None:
+        with self.lock:
+            table = self.get_table(table_name)
+            row = table.insert(table.encode(params))
+        return table.decode(list(params), [tuple(row[column] for column in params)])[0]
+
+    def write_many(
+        self,
+        table_name: str,
+        inserts: list[dict],
+        updates: list[tuple[dict, dict]],
+    ) -> list[tuple[dict, dict]]:
+        missed: list[tuple[dict, dict]] = []
+        with self.transaction(self.get_table(table_name)) as table:
+            for params in inserts:
+                table.insert(table.encode(params))
+            for update in updates:
+                params, filters = update
+                rowids = table.find(table.encode(filters))
+                if not rowids:
+                    missed.append(update)
+                for rowid in rowids:
+                    table.update(rowid, table.encode(params))
+        return missed
+
+    def upsert_items(
+        self,
+        table_name: str,
+        rows: list[dict],
+        conflict_fields: list[str],
+        update_fields: list[str],
+    ) -> list[tuple]:
+        if not rows:
+            return []
+        column_names = list(rows[0].keys())
+        results: list[tuple] = []
+        with self.transaction(self.get_table(table_name)) as table:
+            if len(conflict_fields) != 1 or (
+                conflict_fields[0] not in table.unique_columns
+            ):
+                raise ValueError(
+                    "Upsert conflict fields must be a primary key or unique column"
+                )
+            conflict_field = conflict_fields[0]
+            for params in rows:
+                params = table.encode(params)
+                value = params.get(conflict_field)
+                existing = []
+                if value is not None:
+                    existing = table.find({conflict_field: value})
+                if not existing:
+                    row = table.insert(params)
+                elif update_fields:
+                    update = {field: params.get(field) for field in update_fields}
+                    row = table.update(existing[0], update)
+                else:
+                    continue
+                results.append(tuple(row[column] for column in column_names))
+            return table.decode(column_names, results)
+
+    def update_item(self, table_name: str, params: dict, filters: dict) -> int:
+        with self.transaction(self.get_table(table_name)) as table:
+            rowids = table.find(table.encode(filters))
+            encoded = table.encode(params)
+            for rowid in rowids:
+                table.update(rowid, encoded)
+        return len(rowids)
+
+    def delete_item(self, table_name: str, filters: dict) -> None:
+        with self.lock:
+            table = self.get_table(table_name)
+            for rowid in table.find(table.encode(filters)):
+                table.delete(rowid)
@@ -0,0 +1,264 @@
+import bisect
+import logging
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Sequence
+
+from pydantic.fields import FieldInfo
+
+from .base import BaseBackend, _null_first
+from .sqlite import SQLiteBackend
+
+logger = logging.getLogger("sharded_backend")
+
+
+class ShardedBackend(BaseBackend):
+    """Route every table operation to one of several backends by a shard key.
+
+    Rows are placed by hashing the `shard_key` column, or by range when
+    `ranges` is given: a sorted list of upper bounds, one less than the number
+    of shards. Operations that filter on the shard key touch a single shard,
+    anything else is scattered to all shards in parallel and merged.
+
+    Shards are used from worker threads, so SQLite shards must be opened with
+    `check_same_thread=False` (see `ShardedBackend.from_paths`).
+    """
+
+    def __init__(
+        self,
+        shards: Sequence[BaseBackend],
+        shard_key: str,
+        ranges: Sequence[Any] | None = None,
+        *args,
+        **kwargs,
+    ):
+        if not shards:
+            raise ValueError("At least one shard is required")
+        if ranges is not None and len(ranges) != len(shards) - 1:
+            raise ValueError("Range sharding needs one upper bound less than shards")
+        logger.debug("Initializing ShardedBackend with %s shards", len(shards))
+        self.shards: list[BaseBackend] = list(shards)
+        self.shard_key = shard_key
+        self.ranges: list[Any] | None = list(ranges) if ranges is not None else None
+        self.executor = ThreadPoolExecutor(
+            max_workers=len(self.shards), thread_name_prefix="pyorm-shard"
+        )
+
+    @classmethod
+    def from_paths(
+        cls,
+        database_paths: Sequence[str],
+        shard_key: str,
+        ranges: Sequence[Any] | None = None,
+    ) -> "ShardedBackend":
+        shards = [
+            SQLiteBackend(database_path, check_same_thread=False)
+            for database_path in database_paths
+        ]
+        return cls(shards, shard_key, ranges)
+
+    def get_connection(self) -> list[Any]:
+        return [shard.get_connection() for shard in self.shards]
+
+    def execute(self, sql: str, cursor: Any, params: dict | list | None = None) -> Any:
+        raise NotImplementedError(
+            "Raw statements must be executed on a shard, see shard_for()"
+        )
+
+    def shard_index(self, value: Any) -> int:
+        if self.ranges is not None:
+            return bisect.bisect_right(self.ranges, value)
+        if isinstance(value, int):
+            return value % len(self.shards)
+        # Builtin hash() of str is salted per process, so it can't place rows
+        digest = zlib.crc32(str(value).encode())
+        return digest % len(self.shards)
+
+    def shard_for(self, value: Any) -> BaseBackend:
+        return self.shards[self.shard_index(value)]
+
+    def _routed_shard(self, filters: dict) -> BaseBackend | None:
+        value = filters.get(self.shard_key)
+        if value is None:
+            return None
+        return self.shard_for(value)
+
+    def _scatter(self, call: Callable[[BaseBackend], Any]) -> list[Any]:
+        return list(self.executor.map(call, self.shards))
+
+    def get_many(
+        self,
+        table_name: str,
+        params: dict,
+        query_fields: list | None = None,
+        _limit: int | None = None,
+        order_by: list[str] | None = None,
+        after: tuple | None = None,
+    ) -> list[Any]:
+        shard = self._routed_shard(params)
+        if shard is not None:
+            return shard.get_many(
+                table_name, params, query_fields, _limit, order_by, after
+            )
+        if order_by and not query_fields:
+            raise ValueError("Ordering across shards requires query_fields")
+        results = self._scatter(
+            lambda shard: shard.get_many(
+                table_name, params, query_fields, _limit, order_by, after
+            )
+        )
+        rows: list[Any] = [row for shard_rows in results for row in shard_rows]
+        if order_by:
+            self._sort_rows(rows, order_by)
+        if _limit is not None:
+            rows = rows[:_limit]
+        return rows
+
+    def _sort_rows(self, rows: list[dict], order_by: list[str]) -> None:
+        # Stable sorts applied from the last key to the first give a
+        # multi-key sort with a direction per key. NULLs sort first, as in SQL
+        for field in reversed(order_by):
+            descending = field.startswith("-")
+            column = field.removeprefix("-")
+            rows.sort(key=lambda row: _null_first(row[column]), reverse=descending)
+
+    def search(
+        self,
+        table_name: str,
+        query: str,
+        query_fields: list[str],
+        rank: bool = True,
+        _limit: int | None = None,
+    ) -> list[dict]:
+        results = self._scatter(
+            lambda shard: shard.search(table_name, query, query_fields, rank, _limit)
+        )
+        rows: list[dict] = [row for shard_rows in results for row in shard_rows]
+        if rank:
+            # Scores are computed per shard, so the merge is approximate
+            self._sort_rows(rows, ["_rank"])
+        if _limit is not None:
+            rows = rows[:_limit]
+        return rows
+
+    def sql_create_db(self, table_name: str, fields: dict[str, FieldInfo]):
+        if self.shard_key not in fields:
+            raise ValueError(f"Shard key {self.shard_key} is not a field of the model")
+        self._scatter(lambda shard: shard.sql_create_db(table_name, fields))
+
+    def sql_drop_table(self, table_name: str) -> None:
+        self._scatter(lambda shard: shard.sql_drop_table(table_name))
+
+    def get_column_definition(self, name: str, field: FieldInfo) -> str:
+        return self.shards[0].get_column_definition(name, field)
+
+    def get_column_constraints(self, field: FieldInfo) -> str:
+        return self.shards[0].get_column_constraints(field)
+
+    def register_table(self, table_name: str, fields: dict[str, FieldInfo]) -> None:
+        for shard in self.shards:
+            shard.register_table(table_name, fields)
+
+    def insert_item(self, table_name: str, params: dict) -> tuple | None:
+        shard = self._routed_shard(params)
+        if shard is None:
+            raise ValueError(
+                f"Cannot insert into a sharded table without {self.shard_key}"
+            )
+        return shard.insert_item(table_name, params)
+
+    def upsert_items(
+        self,
+        table_name: str,
+        rows: list[dict],
+        conflict_fields: list[str],
+        update_fields: list[str],
+    ) -> list[tuple]:
+        if self.shard_key not in conflict_fields:
+            raise ValueError(
+                f"Upserts on a sharded table must conflict on {self.shard_key}"
+            )
+        batches: dict[int, list[dict]] = {}
+        for row in rows:
+            if row.get(self.shard_key) is None:
+                raise ValueError(
+                    f"Cannot upsert into a sharded table without {self.shard_key}"
+                )
+            batches.setdefault(self.shard_index(row[self.shard_key]), []).append(row)
+        results = self.executor.map(
+            lambda item: self.shards[item[0]].upsert_items(
+                table_name, item[1], conflict_fields, update_fields
+            ),
+            batches.items(),
+        )
+        return [row for shard_rows in results for row in shard_rows]
+
+    def write_many(
+        self,
+        table_name: str,
+        inserts: list[dict],
+        updates: list[tuple[dict, dict]],
+    ) -> list[tuple[dict, dict]]:
+        """Write each shard's part in its own transaction"""
+        shard_inserts: list[list[dict]] = [[] for _ in self.shards]
+        shard_updates: list[list[tuple[dict, dict]]] = [[] for _ in self.shards]
+        for row in inserts:
+            if row.get(self.shard_key) is None:
+                raise ValueError(
+                    f"Cannot insert into a sharded table without {self.shard_key}"
+                )
+            shard_inserts[self.shard_index(row[self.shard_key])].append(row)
+        for update in updates:
+            params, filters = update
+            if self.shard_key in params:
+                raise ValueError(
+                    "Updating the shard key would move rows between shards"
+                )
+            value = filters.get(self.shard_key)
+            if value is None:
+                for shard_update in shard_updates:
+                    shard_update.append(update)
+            else:
+                shard_updates[self.shard_index(value)].append(update)
+        indexes = [
+            index
+            for index in range(len(self.shards))
+            if shard_inserts[index] or shard_updates[index]
+        ]
+        results = self.executor.map(
+            lambda index: self.shards[index].write_many(
+                table_name, shard_inserts[index], shard_updates[index]
+            ),
+            indexes,
+        )
+        # Updates sent to every shard only missed if no shard matched them
+        misses: dict[int, int] = {}
+        for shard_missed in results:
+            for update in shard_missed:
+                misses[id(update)] = misses.get(id(update), 0) + 1
+        return [
+            update
+            for update in updates
+            if misses.get(id(update), 0)
+            == (len(indexes) if update[1].get(self.shard_key) is None else 1)
+        ]
+
+    def update_item(self, table_name: str, params: dict, filters: dict) -> int:
+        if self.shard_key in params:
+            raise ValueError("Updating the shard key would move rows between shards")
+        shard = self._routed_shard(filters)
+        if shard is not None:
+            return shard.update_item(table_name, params, filters)
+        return sum(
+            self._scatter(lambda shard: shard.update_item(table_name, params, filters))
+        )
+
+    def delete_item(self, table_name: str, filters: dict) -> None:
+        shard = self._routed_shard(filters)
+        if shard is not None:
+            shard.delete_item(table_name, filters)
+            return
+        self._scatter(lambda shard: shard.delete_item(table_name, filters))
+
+    def __del__(self, *args, **kwargs):
+        self.executor.shutdown(wait=False)
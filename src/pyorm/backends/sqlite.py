@@ -1,39 +1,289 @@
+import atexit
 import contextlib
-import decimal
+import functools
 import logging
 import sqlite3
+import threading
+import time
 import types
-from typing import Any, Union, get_origin
+import weakref
+from typing import Any, Iterator, Literal, NamedTuple, Union, get_origin
 
+from pydantic import BaseModel, ConfigDict
 from pydantic.fields import FieldInfo
+from pydantic_core import PydanticUndefined
 
-from pyorm.utils import is_field_primary_key
+from pyorm.utils import (
+    is_field_indexed,
+    is_field_primary_key,
+    is_field_searchable,
+    is_field_unique,
+)
 
 from .base import BaseBackend
+from .column_types import TableCodec, TypeRegistry, default_column_types
 
 UnionType = getattr(types, "UnionType", Union)
 NoneType = type(None)
 
 logger = logging.getLogger("sqlite_backend")
 
-type_affinities = {
-    str: "TEXT",
-    decimal.Decimal: "NUMERIC",
-    int: "INTEGER",
-    float: "REAL",
-    bool: "INTEGER",
+
+class SQLiteProfile(BaseModel):
+    """PRAGMA settings applied to every new connection. Unset values keep the
+    SQLite defaults"""
+
+    model_config = ConfigDict(frozen=True)
+
+    # page_size goes first, it only has effect before the database is written
+    page_size: int | None = None
+    journal_mode: (
+        Literal["DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"] | None
+    ) = None
+    synchronous: Literal["OFF", "NORMAL", "FULL", "EXTRA"] | None = None
+    mmap_size: int | None = None
+    cache_size: int | None = None
+    temp_store: Literal["DEFAULT", "FILE", "MEMORY"] | None = None
+    busy_timeout: int | None = None
+
+    def pragmas(self) -> dict[str, Any]:
+        return self.model_dump(exclude_none=True)
+
+
+profiles: dict[str, SQLiteProfile] = {
+    "durable": SQLiteProfile(journal_mode="WAL", synchronous="FULL", busy_timeout=5000),
+    "throughput": SQLiteProfile(
+        journal_mode="WAL",
+        synchronous="NORMAL",
+        mmap_size=256 * 1024 * 1024,
+        cache_size=-64 * 1024,
+        temp_store="MEMORY",
+        busy_timeout=5000,
+    ),
+    "bulk_load": SQLiteProfile(
+        journal_mode="MEMORY",
+        synchronous="OFF",
+        cache_size=-256 * 1024,
+        temp_store="MEMORY",
+    ),
 }
 
 
+class MemoryFootprint(NamedTuple):
+    page_count: int
+    page_size: int
+    size: int
+    warmup_time: float
+
+
+def _close_backend(ref: "weakref.ref[SQLiteBackend]") -> None:
+    backend = ref()
+    if backend is not None:
+        backend.close()
+
+
+def _run_checkpoints(
+    ref: "weakref.ref[SQLiteBackend]", stop: threading.Event, interval: float
+) -> None:
+    # Only a weak reference is held between checkpoints, so an unused backend
+    # can still be collected and closed
+    while not stop.wait(interval):
+        backend = ref()
+        if backend is None:
+            return
+        try:
+            backend.checkpoint()
+        except Exception:
+            logger.exception("Failed to checkpoint %s", backend.database_path)
+        del backend
+
+
 class SQLiteBackend(BaseBackend):
+    """Store tables in the SQLite database at `database_path`.
+
+    With `load_into_memory` the file is copied into an in-memory database at
+    startup with the backup API, and every statement runs against the copy.
+    Writes are copied back to the file by `checkpoint()`, called every
+    `checkpoint_interval` seconds when set, and on `close()`, garbage
+    collection or exit. The file must not be written by anything else
+    meanwhile, as checkpoints overwrite it.
+    """
+
+    changelog_table = "_pyorm_changelog"
 
     def get_connection(self):
         return self.connection
 
-    def __init__(self, database_path: str, *args, **kwargs):
+    def __init__(
+        self,
+        database_path: str,
+        *args,
+        check_same_thread: bool = True,
+        profile: str | SQLiteProfile | None = None,
+        load_into_memory: bool = False,
+        checkpoint_interval: float | None = None,
+        **kwargs,
+    ):
         logger.debug("Initializing SQLiteBackend in %s", database_path)
+        if checkpoint_interval is not None and not load_into_memory:
+            raise ValueError("checkpoint_interval needs load_into_memory")
+        if checkpoint_interval is not None and check_same_thread:
+            raise ValueError("Scheduled checkpoints need check_same_thread=False")
         self.database_path = database_path
-        self.connection = sqlite3.connect(self.database_path)
+        self.check_same_thread = check_same_thread
+        self.profile = self._get_profile(profile)
+        self.load_into_memory = load_into_memory
+        self.column_types = TypeRegistry(default_column_types)
+        self.table_codecs: dict[str, tuple[dict[str, FieldInfo], int, TableCodec]] = {}
+        self.lock = threading.RLock()
+        self.warmup_time = 0.0
+        self._closed = False
+        self._checkpointed_state = (0, 0)
+        self._stop_checkpoints = threading.Event()
+        self._checkpoint_thread: threading.Thread | None = None
+        self._close_at_exit = functools.partial(_close_backend, weakref.ref(self))
+        if load_into_memory:
+            self.connection = self._load_into_memory()
+            atexit.register(self._close_at_exit)
+        else:
+            self.connection = self.connect()
+        if checkpoint_interval is not None:
+            self._checkpoint_thread = threading.Thread(
+                target=_run_checkpoints,
+                args=(weakref.ref(self), self._stop_checkpoints, checkpoint_interval),
+                name="pyorm-checkpoint",
+                daemon=True,
+            )
+            self._checkpoint_thread.start()
+
+    def _get_profile(self, profile: str | SQLiteProfile | None) -> SQLiteProfile:
+        if profile is None:
+            return SQLiteProfile()
+        if isinstance(profile, str):
+            if profile not in profiles:
+                raise ValueError(f"Unknown SQLite profile {profile}")
+            return profiles[profile]
+        return profile
+
+    def connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(
+            self.database_path, check_same_thread=self.check_same_thread
+        )
+        self._set_pragmas(connection, self.profile.pragmas())
+        return connection
+
+    def _load_into_memory(self) -> sqlite3.Connection:
+        start = time.perf_counter()
+        connection = sqlite3.connect(
+            ":memory:", check_same_thread=self.check_same_thread
+        )
+        source = self.connect()
+        try:
+            source.backup(connection)
+        finally:
+            source.close()
+        # The page size comes with the copied pages
+        pragmas = self.profile.pragmas()
+        pragmas.pop("page_size", None)
+        self._set_pragmas(connection, pragmas)
+        self.warmup_time = time.perf_counter() - start
+        self._checkpointed_state = self._write_state(connection)
+        logger.info(
+            "Loaded %s into memory in %.3fs",
+            self.database_path,
+            self.warmup_time,
+        )
+        return connection
+
+    def _write_state(self, connection: sqlite3.Connection) -> tuple[int, int]:
+        """Rows changed and schema version of `connection`: `total_changes`
+        doesn't count DDL, which bumps the schema version instead"""
+        schema_version = connection.execute("PRAGMA schema_version").fetchone()[0]
+        return connection.total_changes, schema_version
+
+    def checkpoint(self) -> bool:
+        """Copy the in-memory database back to its file if it was written
+        since the last checkpoint. Return whether it was copied"""
+        if not self.load_into_memory:
+            return False
+        with self.lock:
+            state = self._write_state(self.connection)
+            if state == self._checkpointed_state:
+                return False
+            start = time.perf_counter()
+            target = self.connect()
+            try:
+                self.connection.backup(target)
+            finally:
+                target.close()
+            self._checkpointed_state = state
+        logger.info(
+            "Checkpointed %s in %.3fs",
+            self.database_path,
+            time.perf_counter() - start,
+        )
+        return True
+
+    def get_memory_footprint(self) -> MemoryFootprint:
+        """Size of the database served by the connection, the memory held by
+        it when loaded into memory, and how long loading took"""
+        pragmas = self.get_pragmas(["page_count", "page_size"])
+        return MemoryFootprint(
+            page_count=pragmas["page_count"],
+            page_size=pragmas["page_size"],
+            size=pragmas["page_count"] * pragmas["page_size"],
+            warmup_time=self.warmup_time,
+        )
+
+    def close(self) -> None:
+        """Stop scheduled checkpoints, write the in-memory database back to its
+        file and close the connection. Later calls do nothing"""
+        if self._closed:
+            return
+        self._closed = True
+        self._stop_checkpoints.set()
+        thread = self._checkpoint_thread
+        # The checkpoint thread itself closes the backend if it drops the last
+        # reference to it
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+        try:
+            if self.load_into_memory:
+                atexit.unregister(self._close_at_exit)
+                self.checkpoint()
+        finally:
+            logger.debug(
+                "Closing connection to SQLite '%s' database", self.database_path
+            )
+            self.connection.close()
+
+    def _set_pragmas(self, connection: sqlite3.Connection, pragmas: dict) -> None:
+        for name, value in pragmas.items():
+            logger.debug("Setting PRAGMA %s = %s", name, value)
+            connection.execute(f"PRAGMA {name} = {value}")
+
+    def get_pragmas(self, names: list[str]) -> dict[str, Any]:
+        return {
+            name: self.connection.execute(f"PRAGMA {name}").fetchone()[0]
+            for name in names
+        }
+
+    @contextlib.contextmanager
+    def bulk_load(
+        self, profile: str | SQLiteProfile = "bulk_load"
+    ) -> Iterator["SQLiteBackend"]:
+        """Switch the connection to `profile` for the duration of an import,
+        restoring the previous settings afterwards"""
+        pragmas = self._get_profile(profile).pragmas()
+        # journal_mode can't change inside a transaction
+        self.connection.commit()
+        previous = self.get_pragmas(list(pragmas))
+        self._set_pragmas(self.connection, pragmas)
+        try:
+            yield self
+        finally:
+            self.connection.commit()
+            self._set_pragmas(self.connection, previous)
 
     def execute(
         self, sql: str, cursor: sqlite3.Cursor, params: dict | list | None = None
@@ -43,21 +293,50 @@ class SQLiteBackend(BaseBackend):
         logger.debug("Executing %s and params %s", sql, params)
         return cursor.execute(sql, params)
 
+    def execute_many(
+        self, sql: str, cursor: sqlite3.Cursor, params: list[Any]
+    ) -> sqlite3.Cursor:
+        logger.debug("Executing %s for %s rows", sql, len(params))
+        return cursor.executemany(sql, params)
+
     def get_cursor(self):
         return contextlib.closing(self.connection.cursor())
 
+    @contextlib.contextmanager
+    def transaction(self) -> Iterator[sqlite3.Cursor]:
+        """Run statements in a transaction committed on exit. The lock lets
+        threads share the connection, see `check_same_thread`"""
+        with self.lock, self.connection, self.get_cursor() as cursor:
+            yield cursor
+
     def get_many(
         self,
         table_name: str,
         params: dict,
         query_fields: list | None = None,
         _limit: int | None = None,
+        order_by: list[str] | None = None,
+        after: tuple | None = None,
     ) -> list[Any]:
-        sql = self.sql_select_build(table_name, params, query_fields)
-        with self.connection:
-            with self.get_cursor() as cursor:
-                res = self.execute(sql, cursor, params)
-                rows = res.fetchall()
+        sql = self.sql_select_build(
+            table_name,
+            params,
+            query_fields,
+            _limit=_limit,
+            order_by=order_by,
+            after=after,
+        )
+        params = self._encode_params(table_name, params)
+        if after is not None:
+            columns = [field.removeprefix("-") for field in order_by or []]
+            after_params = self._encode_params(table_name, dict(zip(columns, after)))
+            params = params | self._get_seek_params(tuple(after_params.values()))
+        codec = self.get_table_codec(table_name)
+        with self.transaction() as cursor:
+            res = self.execute(sql, cursor, params)
+            rows = res.fetchall()
+        if codec is not None:
+            rows = codec.decode_rows(query_fields or codec.columns, rows)
         if query_fields:
             values = []
             for row in rows:
@@ -72,32 +351,296 @@ class SQLiteBackend(BaseBackend):
 
     def sql_create_db(self, table_name: str, fields: dict[str, FieldInfo]):
         logger.debug(f"{table_name=} {fields=}")
+        with self.transaction() as cursor:
+            self.execute(self.sql_create_table(table_name, fields), cursor)
+            for sql in self.sql_table_extras(table_name, fields):
+                self.execute(sql, cursor)
+
+    def sql_create_table(self, table_name: str, fields: dict[str, FieldInfo]) -> str:
         column_definitions: list[str] = []
         for field_name, field in fields.items():
             column_definition = self.get_column_definition(field_name, field)
             column_definitions.append(column_definition)
         column_definition_str = ", ".join(column_definitions)
-        sql = f"CREATE TABLE '{table_name}'({column_definition_str})"
+        return f"CREATE TABLE '{table_name}'({column_definition_str})"
 
-        with self.connection:
-            with self.get_cursor() as cursor:
-                self.execute(sql, cursor)
+    def sql_table_extras(
+        self, table_name: str, fields: dict[str, FieldInfo]
+    ) -> list[str]:
+        """Statements creating the objects attached to a table, run after it is
+        created or rebuilt"""
+        statements: list[str] = []
+        for field_name, field in fields.items():
+            if is_field_indexed(field):
+                index_name = self.get_index_name(table_name, field_name)
+                statements.append(
+                    f"CREATE INDEX IF NOT EXISTS '{index_name}' "
+                    f"ON '{table_name}'({field_name})"
+                )
+        search_fields = [
+            name for name, field in fields.items() if is_field_searchable(field)
+        ]
+        if search_fields:
+            statements.extend(self.sql_search_index(table_name, search_fields))
+        return statements
+
+    def get_index_name(self, table_name: str, field_name: str) -> str:
+        return f"idx_{table_name}_{field_name}"
+
+    def get_search_table_name(self, table_name: str) -> str:
+        return f"{table_name}_fts"
+
+    def sql_search_index(self, table_name: str, search_fields: list[str]) -> list[str]:
+        """Statements creating an FTS5 table indexing `search_fields` of
+        `table_name` without copying them, and the triggers keeping it in sync"""
+        fts_table = self.get_search_table_name(table_name)
+        columns = ", ".join(search_fields)
+        new_values = ", ".join(f"new.{field}" for field in search_fields)
+        old_values = ", ".join(f"old.{field}" for field in search_fields)
+        insert_new = (
+            f"INSERT INTO '{fts_table}'(rowid, {columns}) "
+            f"VALUES (new.rowid, {new_values});"
+        )
+        delete_old = (
+            f"INSERT INTO '{fts_table}'('{fts_table}', rowid, {columns}) "
+            f"VALUES ('delete', old.rowid, {old_values});"
+        )
+        return [
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS '{fts_table}' USING fts5({columns}, "
+            f"content='{table_name}', content_rowid='rowid')",
+            f"CREATE TRIGGER IF NOT EXISTS '{fts_table}_insert' AFTER INSERT ON "
+            f"'{table_name}' BEGIN {insert_new} END",
+            f"CREATE TRIGGER IF NOT EXISTS '{fts_table}_delete' AFTER DELETE ON "
+            f"'{table_name}' BEGIN {delete_old} END",
+            f"CREATE TRIGGER IF NOT EXISTS '{fts_table}_update' AFTER UPDATE ON "
+            f"'{table_name}' BEGIN {delete_old} {insert_new} END",
+        ]
+
+    def sql_drop_search_index(self, table_name: str) -> list[str]:
+        fts_table = self.get_search_table_name(table_name)
+        return [
+            *(
+                f"DROP TRIGGER IF EXISTS '{fts_table}_{operation}'"
+                for operation in ("insert", "delete", "update")
+            ),
+            f"DROP TABLE IF EXISTS '{fts_table}'",
+        ]
+
+    def sql_rebuild_search_index(self, table_name: str) -> str:
+        fts_table = self.get_search_table_name(table_name)
+        return f"INSERT INTO '{fts_table}'('{fts_table}') VALUES ('rebuild')"
+
+    def search(
+        self,
+        table_name: str,
+        query: str,
+        query_fields: list[str],
+        rank: bool = True,
+        _limit: int | None = None,
+    ) -> list[dict]:
+        fts_table = self.get_search_table_name(table_name)
+        columns = [f'"{table_name}".{field}' for field in query_fields]
+        order_str = ""
+        if rank:
+            columns.append(f'"{fts_table}".rank')
+            order_str = f' ORDER BY "{fts_table}".rank'
+        limit_str = f" LIMIT {_limit}" if _limit is not None else ""
+        sql = (
+            f"SELECT {', '.join(columns)} FROM \"{fts_table}\" JOIN \"{table_name}\" "
+            f'ON "{table_name}".rowid = "{fts_table}".rowid '
+            f'WHERE "{fts_table}" MATCH :query{order_str}{limit_str}'
+        )
+        with self.transaction() as cursor:
+            rows = self.execute(sql, cursor, {"query": query}).fetchall()
+        names = [*query_fields, "_rank"] if rank else query_fields
+        codec = self.get_table_codec(table_name)
+        if codec is not None:
+            rows = codec.decode_rows(names, rows)
+        return [dict(zip(names, row)) for row in rows]
+
+    def get_table_columns(self, table_name: str) -> dict[str, tuple[str, bool, bool]]:
+        """Map the columns of `table_name` to their (type, not null, primary key)"""
+        rows = self.connection.execute(f"PRAGMA table_info('{table_name}')")
+        return {
+            name: (column_type, bool(not_null), bool(pk))
+            for _, name, column_type, not_null, _, pk in rows.fetchall()
+        }
+
+    def get_column_signature(self, field: FieldInfo) -> tuple[str, bool, bool]:
+        """Return the (type, not null, primary key) a field's column should have"""
+        primary_key = is_field_primary_key(field)
+        origin = get_origin(field.annotation)
+        not_null = not primary_key and (
+            origin is None or not self.is_union_type(origin)
+        )
+        return self.get_type_affinity(field), not_null, primary_key
+
+    def get_table_indexes(self, table_name: str) -> tuple[set[str], set[str]]:
+        """Return the names of the declared indexes of `table_name` and the
+        columns having a single column UNIQUE constraint"""
+        index_names: set[str] = set()
+        unique_columns: set[str] = set()
+        rows = self.connection.execute(f"PRAGMA index_list('{table_name}')")
+        for _, index_name, unique, origin, _ in rows.fetchall():
+            if origin == "c":
+                index_names.add(index_name)
+            elif unique and origin == "u":
+                info = self.connection.execute(f"PRAGMA index_info('{index_name}')")
+                columns = info.fetchall()
+                if len(columns) == 1:
+                    unique_columns.add(columns[0][2])
+        return index_names, unique_columns
+
+    def sql_default_value(self, field: FieldInfo) -> str | None:
+        """Return the SQL literal of the field default, if it has a usable one"""
+        default = field.get_default(call_default_factory=True)
+        if default is None or default is PydanticUndefined:
+            return None
+        value = self._clean_params({"default": default})["default"]
+        if isinstance(value, str):
+            escaped = value.replace("'", "''")
+            return f"'{escaped}'"
+        if isinstance(value, (int, float)):
+            return repr(value)
+        return None
 
     def sql_drop_table(self, table_name: str) -> None:
         logger.info("Dropping table %s", table_name)
         sql: str = f"DROP TABLE IF EXISTS '{table_name}'"
-        with self.connection:
-            with self.get_cursor() as cursor:
+        fts_table = self.get_search_table_name(table_name)
+        with self.transaction() as cursor:
+            self.execute(sql, cursor)
+            self.execute(f"DROP TABLE IF EXISTS '{fts_table}'", cursor)
+
+    def sql_change_tracking(self, table_name: str, pk_column: str) -> list[str]:
+        """Statements creating the changelog and the triggers appending the
+        changes of `table_name` to it"""
+        changelog = self.changelog_table
+        log = f"INSERT INTO '{changelog}'(table_name, pk, op)"
+        table = table_name.replace("'", "''")
+        return [
+            f"CREATE TABLE IF NOT EXISTS '{changelog}'(seq INTEGER PRIMARY KEY "
+            "AUTOINCREMENT, table_name TEXT NOT NULL, pk, op TEXT NOT NULL)",
+            f"CREATE INDEX IF NOT EXISTS 'idx_{changelog}_table_name' "
+            f"ON '{changelog}'(table_name, pk)",
+            f"CREATE TRIGGER IF NOT EXISTS '{table_name}_changes_insert' AFTER INSERT "
+            f"ON '{table_name}' BEGIN {log} VALUES ('{table}', NEW.{pk_column}, "
+            "'insert'); END",
+            # A changed primary key is logged as a delete of the old key
+            f"CREATE TRIGGER IF NOT EXISTS '{table_name}_changes_update' AFTER UPDATE "
+            f"ON '{table_name}' BEGIN {log} SELECT '{table}', OLD.{pk_column}, "
+            f"'delete' WHERE OLD.{pk_column} IS NOT NEW.{pk_column}; {log} VALUES "
+            f"('{table}', NEW.{pk_column}, 'update'); END",
+            f"CREATE TRIGGER IF NOT EXISTS '{table_name}_changes_delete' AFTER DELETE "
+            f"ON '{table_name}' BEGIN {log} VALUES ('{table}', OLD.{pk_column}, "
+            "'delete'); END",
+        ]
+
+    def has_change_tracking(self, table_name: str) -> bool:
+        names = {
+            name
+            for (name,) in self.connection.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger' "
+                "AND tbl_name = ?",
+                (table_name,),
+            ).fetchall()
+        }
+        return all(
+            f"{table_name}_changes_{operation}" in names
+            for operation in ("insert", "update", "delete")
+        )
+
+    def _has_changelog(self, cursor: sqlite3.Cursor) -> bool:
+        """The changelog is created with the first tracked table"""
+        sql = "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?"
+        return self.execute(sql, cursor, [self.changelog_table]).fetchone() is not None
+
+    def install_change_tracking(self, table_name: str, pk_column: str) -> None:
+        with self.transaction() as cursor:
+            for sql in self.sql_change_tracking(table_name, pk_column):
                 self.execute(sql, cursor)
 
+    def get_changes(
+        self,
+        since: int,
+        table_names: list[str] | None = None,
+        _limit: int | None = None,
+    ) -> list[tuple]:
+        changelog = self.changelog_table
+        sql = f"SELECT seq, table_name, pk, op FROM '{changelog}' WHERE seq > ?"
+        params: list[Any] = [since]
+        if table_names is not None:
+            placeholders = ", ".join("?" for _ in table_names)
+            sql = f"{sql} AND table_name IN ({placeholders})"
+            params.extend(table_names)
+        sql = f"{sql} ORDER BY seq"
+        if _limit is not None:
+            sql = f"{sql} LIMIT {_limit}"
+        with self.transaction() as cursor:
+            if not self._has_changelog(cursor):
+                return []
+            return self.execute(sql, cursor, params).fetchall()
+
+    def get_last_change_seq(self) -> int:
+        sql = f"SELECT MAX(seq) FROM '{self.changelog_table}'"
+        with self.transaction() as cursor:
+            if not self._has_changelog(cursor):
+                return 0
+            return self.execute(sql, cursor).fetchone()[0] or 0
+
+    def get_change_version(self) -> tuple[int, int]:
+        # data_version changes on commits of other connections, total_changes
+        # on the writes of this one
+        with self.transaction() as cursor:
+            data_version = self.execute("PRAGMA data_version", cursor).fetchone()[0]
+        return data_version, self.connection.total_changes
+
+    def compact_changelog(self, before_seq: int | None = None) -> int:
+        changelog = self.changelog_table
+        with self.transaction() as cursor:
+            if not self._has_changelog(cursor):
+                return 0
+            res = self.execute(
+                f"DELETE FROM '{changelog}' WHERE seq NOT IN (SELECT MAX(seq) "
+                f"FROM '{changelog}' GROUP BY table_name, pk)",
+                cursor,
+            )
+            deleted = res.rowcount
+            if before_seq is not None:
+                res = self.execute(
+                    f"DELETE FROM '{changelog}' WHERE seq <= ?", cursor, [before_seq]
+                )
+                deleted += res.rowcount
+        return deleted
+
+    def get_type_affinity(self, field: FieldInfo) -> str:
+        field_type = self.get_field_type(field)
+        return self.column_types.get(field_type).affinity.upper()
+
+    def register_table(self, table_name: str, fields: dict[str, FieldInfo]) -> None:
+        cached = self.table_codecs.get(table_name)
+        version = self.column_types.version
+        if cached is not None and cached[0] is fields and cached[1] == version:
+            return
+        column_types = [
+            self.column_types.get(self.get_field_type(field))
+            for field in fields.values()
+        ]
+        codec = TableCodec.from_column_types(list(fields), column_types)
+        self.table_codecs[table_name] = (fields, version, codec)
+
+    def get_table_codec(self, table_name: str) -> TableCodec | None:
+        cached = self.table_codecs.get(table_name)
+        return cached[2] if cached is not None else None
+
     def get_column_definition(self, name: str, field: FieldInfo) -> str:
         field_type = self.get_field_type(field)
-        type_affinity: str = type_affinities.get(field_type, type_affinities[str])
+        type_affinity: str = self.get_type_affinity(field)
         constraints = self.get_column_constraints(field)
         logger.debug(
             "Field %s, Field type: %s constraints: %s", name, field_type, constraints
         )
-        return f"{name} {type_affinity.upper()}{constraints}"
+        return f"{name} {type_affinity}{constraints}"
 
     def get_column_constraints(self, field: FieldInfo) -> str:
         constraints = ""
@@ -106,37 +649,132 @@ class SQLiteBackend(BaseBackend):
             constraints = f"{constraints} PRIMARY KEY"
         elif origin is None or not self.is_union_type(origin):
             constraints = f"{constraints} NOT NULL"
+        if is_field_unique(field) and not is_field_primary_key(field):
+            constraints = f"{constraints} UNIQUE"
         return constraints
 
     def insert_item(self, table_name: str, params: dict) -> tuple | None:
-        sql = self.sql_insert_row(table_name, list(params.keys()))
-        with self.connection:
-            with self.get_cursor() as cursor:
-                res = self.execute(sql, cursor, self._clean_params(params))
-                return res.fetchone()
+        column_names = list(params.keys())
+        sql = self.sql_insert_row(table_name, column_names)
+        codec = self.get_table_codec(table_name)
+        with self.transaction() as cursor:
+            res = self.execute(sql, cursor, self._encode_row(codec, params))
+            row = res.fetchone()
+        if codec is not None and row is not None:
+            row = codec.decode_rows(column_names, [row])[0]
+        return row
+
+    def write_many(
+        self,
+        table_name: str,
+        inserts: list[dict],
+        updates: list[tuple[dict, dict]],
+    ) -> list[tuple[dict, dict]]:
+        codec = self.get_table_codec(table_name)
+        insert_groups: dict[tuple[str, ...], list[list[Any]]] = {}
+        for row in inserts:
+            insert_groups.setdefault(tuple(row), []).append(
+                self._encode_row(codec, row)
+            )
+        update_groups: dict[
+            tuple[tuple[str, ...], tuple[str, ...]], list[tuple[tuple, dict]]
+        ] = {}
+        for update in updates:
+            params, filters = update
+            update_groups.setdefault((tuple(params), tuple(filters)), []).append(
+                (update, self._encode_params(table_name, params | filters))
+            )
+        missed: list[tuple[dict, dict]] = []
+        with self.transaction() as cursor:
+            for column_names, insert_rows in insert_groups.items():
+                sql = self.sql_insert_row(
+                    table_name, list(column_names), returning=False
+                )
+                self.execute_many(sql, cursor, insert_rows)
+            for (param_names, filter_names), update_rows in update_groups.items():
+                sql = self.sql_update_row(
+                    table_name,
+                    dict.fromkeys(param_names),
+                    dict.fromkeys(filter_names, True),
+                )
+                # One execute per update, executemany only counts all rows
+                for update, row in update_rows:
+                    if not self.execute(sql, cursor, row).rowcount:
+                        missed.append(update)
+        return missed
+
+    def _encode_row(self, codec: TableCodec | None, params: dict) -> list[Any]:
+        """Encode a row into positional parameters, ordered as `params`"""
+        if codec is None:
+            return list(self._clean_params(params).values())
+        if codec.columns == tuple(params):
+            return codec.encode_values(list(params.values()))
+        return list(codec.encode(params).values())
+
+    def upsert_items(
+        self,
+        table_name: str,
+        rows: list[dict],
+        conflict_fields: list[str],
+        update_fields: list[str],
+    ) -> list[tuple]:
+        if not rows:
+            return []
+        column_names = list(rows[0].keys())
+        codec = self.get_table_codec(table_name)
+        max_params = self.connection.getlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER)
+        batch_size = max(1, max_params // len(column_names))
+        results: list[tuple] = []
+        with self.transaction() as cursor:
+            for start in range(0, len(rows), batch_size):
+                batch = rows[start : start + batch_size]
+                sql = self.sql_upsert_rows(
+                    table_name,
+                    column_names,
+                    len(batch),
+                    conflict_fields,
+                    update_fields,
+                )
+                params: list[Any] = []
+                for row in batch:
+                    params.extend(self._encode_row(codec, row))
+                res = self.execute(sql, cursor, params)
+                results.extend(res.fetchall())
+        if codec is not None:
+            results = codec.decode_rows(column_names, results)
+        return results
 
     def _clean_params(self, params: dict) -> dict:
+        """Encode values looking up the type of each one, for tables without a
+        compiled codec"""
         new_params = params.copy()
         for key, v in params.items():
-            if isinstance(v, decimal.Decimal):
-                new_params[key] = str(v)
-            if isinstance(v, bool):
-                new_params[key] = 1 if v else 0
+            if v is None:
+                continue
+            encoder = self.column_types.get(type(v)).encoder
+            if encoder is not None:
+                new_params[key] = encoder(v)
         return new_params
 
+    def _encode_params(self, table_name: str, params: dict) -> dict:
+        codec = self.get_table_codec(table_name)
+        if codec is None:
+            return self._clean_params(params)
+        return codec.encode(params)
+
     def update_item(self, table_name: str, params: dict, filters: dict) -> int:
         sql: str = self.sql_update_row(table_name, params, filters)
-        with self.connection:
-            with self.get_cursor() as cursor:
-                res = self.execute(sql, cursor, self._clean_params(params | filters))
-                return res.rowcount
+        with self.transaction() as cursor:
+            res = self.execute(
+                sql, cursor, self._encode_params(table_name, params | filters)
+            )
+            return res.rowcount
 
     def delete_item(self, table_name: str, filters: dict) -> None:
         sql = self.sql_delete_row(table_name, filters)
-        with self.connection:
-            with self.get_cursor() as cursor:
-                self.execute(sql, cursor, self._clean_params(filters))
+        with self.transaction() as cursor:
+            self.execute(sql, cursor, self._encode_params(table_name, filters))
 
     def __del__(self, *args, **kwargs):
-        logger.debug("Closing connection to SQLite '%s' database", self.database_path)
-        self.connection.close()
+        if hasattr(self, "connection"):
+            self.close()
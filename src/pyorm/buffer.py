@@ -0,0 +1,234 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Callable
+
+from pyorm.exceptions import DoesNotExist
+
+if TYPE_CHECKING:
+    from pyorm.models import Model
+
+logger = logging.getLogger("pyorm_buffer")
+
+ErrorCallback = Callable[[Exception, list[dict], list[tuple[dict, dict]]], None]
+
+
+class WriteBuffer:
+    """Queue saves of `model` and write them in batches from a background thread.
+
+    Inserts and updates are collected until `max_size` writes are pending or
+    the oldest one waited `max_delay` seconds, then written with executemany
+    in one transaction. Updates of the same primary key are merged, also into
+    a pending insert of that key. `save()` blocks while `max_queue` writes are
+    pending, raising `queue.Full` after `block_timeout` seconds if given.
+    Failed batches are passed to `on_error`, or logged when it isn't set, as
+    are updates matching no row, with a `DoesNotExist` error.
+
+    Rows become visible only once they are flushed. Autoincrement keys are
+    assigned then, but not set on the instances: saving such an instance again
+    updates its pending insert, and raises `RuntimeError` once it was flushed,
+    as the row can't be found without its key. The backend is used from the
+    flush thread, so SQLite backends must be opened with
+    `check_same_thread=False`.
+    """
+
+    def __init__(
+        self,
+        model: type["Model"],
+        max_size: int = 500,
+        max_delay: float = 0.05,
+        max_queue: int = 10_000,
+        block_timeout: float | None = None,
+        on_error: ErrorCallback | None = None,
+    ):
+        if max_queue < max_size:
+            raise ValueError("max_queue must be at least max_size")
+        self.model = model
+        self.max_size = max_size
+        self.max_delay = max_delay
+        self.max_queue = max_queue
+        self.block_timeout = block_timeout
+        self.on_error = on_error
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        # Batches are taken and written under this lock, so they keep order
+        self._write_lock = threading.Lock()
+        self._inserts: list[dict] = []
+        self._pending_inserts: dict[Any, dict] = {}
+        # Inserts waiting for a database assigned key, by instance identity
+        self._pending_new: dict[int, tuple["Model", dict]] = {}
+        self._updates: dict[Any, dict] = {}
+        self._oldest: float | None = None
+        self._closed = False
+        self._thread = threading.Thread(
+            target=self._run, name=f"pyorm-buffer-{model.table_name}", daemon=True
+        )
+        self._thread.start()
+        atexit.register(self.close)
+
+    @property
+    def pending(self) -> int:
+        return len(self._inserts) + len(self._updates)
+
+    def attach(self) -> "WriteBuffer":
+        """Route `save()` of every instance of the model through the buffer"""
+        self.model._write_buffer = self
+        return self
+
+    def detach(self) -> None:
+        if self.model.__dict__.get("_write_buffer") is self:
+            self.model._write_buffer = None
+
+    def save(self, instance: "Model") -> None:
+        pk_field_name = self.model.get_pk_field_name()
+        pk = getattr(instance, pk_field_name, None) if pk_field_name else None
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("WriteBuffer is closed")
+            if pk is not None and instance._modified_fields:
+                params = {
+                    field: getattr(instance, field)
+                    for field in instance._modified_fields
+                }
+                if pk in self._pending_inserts:
+                    self._pending_inserts[pk].update(params)
+                elif pk in self._updates:
+                    self._updates[pk].update(params)
+                else:
+                    self._wait_for_space()
+                    self._updates[pk] = params
+            elif pk_field_name and pk is None and id(instance) in self._pending_new:
+                row = self._pending_new[id(instance)][1]
+                row.update(instance.model_dump(exclude_computed_fields=True))
+            elif pk_field_name and pk is None and "_buffered_insert" in vars(instance):
+                raise RuntimeError(
+                    f"{self.model.__name__} was inserted through a WriteBuffer "
+                    "without its primary key, fetch it before saving it again"
+                )
+            else:
+                row = instance.model_dump(exclude_computed_fields=True)
+                self._wait_for_space()
+                self._inserts.append(row)
+                if pk is not None:
+                    self._pending_inserts[pk] = row
+                elif pk_field_name:
+                    self._pending_new[id(instance)] = (instance, row)
+                    instance._buffered_insert = True
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            if self.pending >= self.max_size:
+                self._changed.notify_all()
+        instance.clean_modified_fields()
+
+    def _wait_for_space(self) -> None:
+        while self.pending >= self.max_queue:
+            self._changed.notify_all()
+            if not self._changed.wait(self.block_timeout):
+                raise queue.Full("WriteBuffer is full")
+            if self._closed:
+                raise RuntimeError("WriteBuffer is closed")
+
+    def _take(self) -> tuple[list[dict], list[tuple[dict, dict]]]:
+        pk_field_name = self.model.get_pk_field_name()
+        inserts = self._inserts
+        updates = [
+            (params, {pk_field_name: pk}) for pk, params in self._updates.items()
+        ]
+        self._inserts = []
+        self._pending_inserts = {}
+        self._pending_new = {}
+        self._updates = {}
+        self._oldest = None
+        self._changed.notify_all()
+        return inserts, updates
+
+    def _write(
+        self, inserts: list[dict], updates: list[tuple[dict, dict]]
+    ) -> list[tuple[dict, dict]]:
+        if not inserts and not updates:
+            return []
+        logger.debug(
+            "Flushing %s inserts and %s updates into %s",
+            len(inserts),
+            len(updates),
+            self.model.table_name,
+        )
+        return self.model.get_backend().write_many(
+            self.model.table_name, inserts, updates
+        )
+
+    def _flush_batch(self, raise_errors: bool) -> None:
+        with self._write_lock:
+            with self._lock:
+                inserts, updates = self._take()
+            try:
+                missed = self._write(inserts, updates)
+            except Exception as exc:
+                self._report(exc, inserts, updates, raise_errors)
+                return
+            if missed:
+                error = DoesNotExist(
+                    f"{len(missed)} buffered updates of {self.model.table_name} "
+                    "matched no row"
+                )
+                self._report(error, [], missed, raise_errors)
+
+    def _report(
+        self,
+        exc: Exception,
+        inserts: list[dict],
+        updates: list[tuple[dict, dict]],
+        raise_errors: bool,
+    ) -> None:
+        if self.on_error is not None:
+            self.on_error(exc, inserts, updates)
+        elif raise_errors:
+            raise exc
+        else:
+            logger.error(
+                "Failed to flush writes into %s",
+                self.model.table_name,
+                exc_info=exc,
+            )
+
+    def flush(self) -> None:
+        """Write everything pending now. Errors are raised unless there is an
+        `on_error` callback"""
+        self._flush_batch(raise_errors=True)
+
+    def _is_due(self) -> bool:
+        if self._oldest is None:
+            return False
+        waited = time.monotonic() - self._oldest
+        return self.pending >= self.max_size or waited >= self.max_delay
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                while not self._closed and not self._is_due():
+                    timeout = None
+                    if self._oldest is not None:
+                        timeout = self._oldest + self.max_delay - time.monotonic()
+                    self._changed.wait(timeout)
+                if self._closed and not self.pending:
+                    return
+            self._flush_batch(raise_errors=False)
+
+    def close(self) -> None:
+        """Stop accepting writes, drain the pending ones and stop the thread"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._changed.notify_all()
+        self._thread.join()
+        self.detach()
+        atexit.unregister(self.close)
+
+    def __enter__(self) -> "WriteBuffer":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
@@ -0,0 +1,87 @@
+import logging
+import threading
+from typing import TYPE_CHECKING, Any, Callable, NamedTuple, Sequence
+
+from pyorm.database import Database
+
+if TYPE_CHECKING:
+    from pyorm.models import Model
+
+logger = logging.getLogger("pyorm_changes")
+
+
+class Change(NamedTuple):
+    seq: int
+    table_name: str
+    pk: Any
+    op: str
+
+
+class ChangePoller:
+    """Poll the changelog for changes to `models`, passing each batch found to
+    `callback`, for example to invalidate caches or run incremental syncs.
+
+    Only changes after `since` are reported, by default those made after the
+    poller is created. A poll first compares the backend change version, so
+    polling an idle database doesn't query the changelog.
+    """
+
+    def __init__(
+        self,
+        models: Sequence[type["Model"]],
+        callback: Callable[[list[Change]], None],
+        interval: float = 1.0,
+        since: int | None = None,
+        batch_size: int = 1000,
+    ):
+        self.table_names = [model.table_name for model in models]
+        self.callback = callback
+        self.interval = interval
+        self.batch_size = batch_size
+        self.backend = Database.get_backend()
+        self.seq = since if since is not None else self.backend.get_last_change_seq()
+        self._version: Any = None
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def poll(self) -> list[Change]:
+        version = self.backend.get_change_version()
+        if version == self._version:
+            return []
+        changes: list[Change] = []
+        while True:
+            rows = self.backend.get_changes(
+                self.seq, self.table_names, _limit=self.batch_size
+            )
+            changes.extend(Change(*row) for row in rows)
+            if rows:
+                self.seq = rows[-1][0]
+            if len(rows) < self.batch_size:
+                break
+        # Only remember the version once every change before it was read
+        self._version = version
+        if changes:
+            self.callback(changes)
+        return changes
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll()
+            except Exception:
+                logger.exception("Failed to poll changes of %s", self.table_names)
+
+    def start(self) -> None:
+        """Poll every `interval` seconds in a background thread. SQLite
+        backends must be opened with `check_same_thread=False`"""
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="pyorm-change-poller", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -4,3 +4,11 @@ class DoesNotExist(Exception):
 
 class MultipleObjectsReturned(Exception):
     pass
+
+
+class MigrationError(Exception):
+    pass
+
+
+class IntegrityError(Exception):
+    pass
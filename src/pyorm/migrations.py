@@ -0,0 +1,338 @@
+import logging
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+from typing import Callable
+
+from pyorm.backends.sqlite import SQLiteBackend
+from pyorm.database import Database
+from pyorm.exceptions import MigrationError
+from pyorm.models import Model
+from pyorm.utils import (
+    is_field_indexed,
+    is_field_primary_key,
+    is_field_searchable,
+    is_field_unique,
+)
+
+logger = logging.getLogger("pyorm_migrations")
+
+ProgressCallback = Callable[[int, int], None]
+
+
+@dataclass
+class SchemaDiff:
+    table_exists: bool = True
+    added: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+    changed: list[str] = field(default_factory=list)
+    missing_indexes: list[str] = field(default_factory=list)
+    missing_search_index: bool = False
+    changed_search_index: bool = False
+    missing_change_tracking: bool = False
+    rebuild_reasons: list[str] = field(default_factory=list)
+
+    @property
+    def is_empty(self) -> bool:
+        return self.table_exists and not (
+            self.added
+            or self.removed
+            or self.changed
+            or self.missing_indexes
+            or self.missing_search_index
+            or self.changed_search_index
+            or self.missing_change_tracking
+        )
+
+    @property
+    def needs_rebuild(self) -> bool:
+        return bool(self.rebuild_reasons)
+
+
+def diff_model(model: type[Model], backend: SQLiteBackend) -> SchemaDiff:
+    """Compare the fields of `model` with the columns of its table"""
+    columns = backend.get_table_columns(model.table_name)
+    if not columns:
+        return SchemaDiff(table_exists=False)
+    fields = model.__pydantic_fields__
+    index_names, unique_columns = backend.get_table_indexes(model.table_name)
+    diff = SchemaDiff()
+    for field_name, field_info in fields.items():
+        if is_field_indexed(field_info):
+            index_name = backend.get_index_name(model.table_name, field_name)
+            if index_name not in index_names:
+                diff.missing_indexes.append(field_name)
+        if field_name not in columns:
+            diff.added.append(field_name)
+            if is_field_primary_key(field_info) or is_field_unique(field_info):
+                diff.rebuild_reasons.append(f"{field_name} added with a constraint")
+            elif (
+                backend.get_column_signature(field_info)[1]
+                and backend.sql_default_value(field_info) is None
+            ):
+                diff.rebuild_reasons.append(f"{field_name} added as NOT NULL")
+            continue
+        unique = is_field_unique(field_info) and not is_field_primary_key(field_info)
+        if columns[field_name] != backend.get_column_signature(field_info) or (
+            unique != (field_name in unique_columns)
+        ):
+            diff.changed.append(field_name)
+            diff.rebuild_reasons.append(f"{field_name} definition changed")
+    search_fields = [
+        name for name, field_info in fields.items() if is_field_searchable(field_info)
+    ]
+    search_table = backend.get_search_table_name(model.table_name)
+    search_columns = list(backend.get_table_columns(search_table))
+    if search_fields and not search_columns:
+        diff.missing_search_index = True
+    elif search_fields != search_columns:
+        diff.changed_search_index = True
+    if model.track_changes:
+        diff.missing_change_tracking = not backend.has_change_tracking(model.table_name)
+    for column in columns:
+        if column not in fields:
+            diff.removed.append(column)
+            diff.rebuild_reasons.append(f"{column} removed")
+    return diff
+
+
+class Migration:
+    """Bring the table of `model` in line with its fields.
+
+    New nullable columns, columns with a default and indexes are added in
+    place. Any other change rebuilds the table: rows are copied by rowid into
+    a new table in short transactions of `batch_size` rows, while triggers
+    mirror concurrent writes, and the tables are swapped atomically at the
+    end. `progress` is called with the copied and total rows after each batch.
+    """
+
+    def __init__(
+        self,
+        model: type[Model],
+        backend: SQLiteBackend | None = None,
+        batch_size: int = 1000,
+        progress: ProgressCallback | None = None,
+    ):
+        self.model = model
+        configured = backend or Database.get_backend()
+        if not isinstance(configured, SQLiteBackend):
+            raise MigrationError("Migrations are only supported on SQLite")
+        self.backend: SQLiteBackend = configured
+        self.batch_size = batch_size
+        self.progress = progress
+        self.diff = diff_model(model, self.backend)
+        self.copied = 0
+        self.total = 0
+        self.error: BaseException | None = None
+        self._thread: threading.Thread | None = None
+
+    @property
+    def table_name(self) -> str:
+        return self.model.table_name
+
+    @property
+    def new_table_name(self) -> str:
+        return f"_pyorm_new_{self.table_name}"
+
+    def run(self) -> None:
+        self._run(self.backend.connection)
+
+    def start(self) -> None:
+        """Run the migration in a background thread on its own connection"""
+        if self.backend.database_path == ":memory:" or self.backend.load_into_memory:
+            raise MigrationError("Background migrations need a database file")
+        self._thread = threading.Thread(
+            target=self._run_in_background, name=f"pyorm-migrate-{self.table_name}"
+        )
+        self._thread.start()
+
+    def wait(self, timeout: float | None = None) -> None:
+        if self._thread is not None:
+            self._thread.join(timeout)
+        if self.error is not None:
+            raise MigrationError(f"Migration of {self.table_name} failed") from (
+                self.error
+            )
+
+    def _run_in_background(self) -> None:
+        connection = self.backend.connect()
+        try:
+            self._run(connection)
+        except BaseException as exc:
+            logger.exception("Migration of %s failed", self.table_name)
+            self.error = exc
+        finally:
+            connection.close()
+
+    def _run(self, connection: sqlite3.Connection) -> None:
+        fields = self.model.__pydantic_fields__
+        if not self.diff.table_exists:
+            logger.info("Creating table %s", self.table_name)
+            statements = [self.backend.sql_create_table(self.table_name, fields)]
+            statements.extend(self.backend.sql_table_extras(self.table_name, fields))
+            self._execute_in_transaction(connection, statements)
+        elif self.diff.needs_rebuild:
+            self._rebuild(connection)
+        elif not self.diff.is_empty:
+            self._execute_in_transaction(connection, self._sql_alter_in_place())
+
+    def _sql_alter_in_place(self) -> list[str]:
+        fields = self.model.__pydantic_fields__
+        statements: list[str] = []
+        for field_name in self.diff.added:
+            field_info = fields[field_name]
+            definition = self.backend.get_column_definition(field_name, field_info)
+            default = self.backend.sql_default_value(field_info)
+            if default is not None:
+                definition = f"{definition} DEFAULT {default}"
+            statements.append(
+                f"ALTER TABLE '{self.table_name}' ADD COLUMN {definition}"
+            )
+        statements.extend(self._sql_table_extras())
+        return statements
+
+    def _sql_table_extras(self) -> list[str]:
+        fields = self.model.__pydantic_fields__
+        statements: list[str] = []
+        if self.diff.changed_search_index:
+            # The FTS table and its triggers name the searchable columns
+            statements.extend(self.backend.sql_drop_search_index(self.table_name))
+        statements.extend(self.backend.sql_table_extras(self.table_name, fields))
+        has_search_fields = any(is_field_searchable(f) for f in fields.values())
+        if has_search_fields and (
+            self.diff.missing_search_index or self.diff.changed_search_index
+        ):
+            # Index the rows that existed before the search table
+            statements.append(self.backend.sql_rebuild_search_index(self.table_name))
+        if self.model.track_changes:
+            statements.extend(
+                self.backend.sql_change_tracking(
+                    self.table_name, self.model.get_change_pk()
+                )
+            )
+        return statements
+
+    def _execute_in_transaction(
+        self, connection: sqlite3.Connection, statements: list[str], params: tuple = ()
+    ) -> None:
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            for sql in statements:
+                logger.debug("Executing %s and params %s", sql, params)
+                connection.execute(sql, params)
+        except BaseException:
+            connection.rollback()
+            raise
+        connection.commit()
+
+    def _column_values(self, prefix: str) -> list[str]:
+        """SQL expressions giving the value of each new column from an old row"""
+        fields = self.model.__pydantic_fields__
+        values: list[str] = []
+        for field_name, field_info in fields.items():
+            if field_name not in self.diff.added:
+                values.append(f"{prefix}{field_name}")
+                continue
+            default = self.backend.sql_default_value(field_info)
+            if default is None and self.backend.get_column_signature(field_info)[1]:
+                raise MigrationError(
+                    f"New NOT NULL column {field_name} needs a default to be filled"
+                )
+            values.append(default or "NULL")
+        return values
+
+    def _rebuild(self, connection: sqlite3.Connection) -> None:
+        fields = self.model.__pydantic_fields__
+        old, new = self.table_name, self.new_table_name
+        logger.info("Rebuilding %s: %s", old, ", ".join(self.diff.rebuild_reasons))
+        columns = ", ".join(["rowid", *fields])
+        new_values = ", ".join(["NEW.rowid", *self._column_values("NEW.")])
+        copy_values = ", ".join(["rowid", *self._column_values("")])
+        # Conflicts are only resolved on rowid, so a row breaking another
+        # constraint of the new table fails the write instead of replacing rows
+        set_columns = ", ".join(f"{name} = excluded.{name}" for name in fields)
+        mirror = (
+            f"INSERT INTO '{new}'({columns}) VALUES({new_values}) "
+            f"ON CONFLICT(rowid) DO UPDATE SET {set_columns};"
+        )
+        triggers = {
+            f"{new}_insert": f"AFTER INSERT ON '{old}' BEGIN {mirror} END",
+            f"{new}_update": f"AFTER UPDATE ON '{old}' BEGIN "
+            f"DELETE FROM '{new}' WHERE rowid = OLD.rowid; {mirror} END",
+            f"{new}_delete": f"AFTER DELETE ON '{old}' BEGIN "
+            f"DELETE FROM '{new}' WHERE rowid = OLD.rowid; END",
+        }
+        self._execute_in_transaction(
+            connection,
+            [
+                f"DROP TABLE IF EXISTS '{new}'",
+                self.backend.sql_create_table(new, fields),
+                *(f"CREATE TRIGGER '{name}' {body}" for name, body in triggers.items()),
+            ],
+        )
+        try:
+            self._copy_rows(connection, columns, copy_values)
+        except sqlite3.IntegrityError as exc:
+            self._execute_in_transaction(
+                connection,
+                [
+                    *(f"DROP TRIGGER IF EXISTS '{name}'" for name in triggers),
+                    f"DROP TABLE IF EXISTS '{new}'",
+                ],
+            )
+            raise MigrationError(
+                f"Rows of {old} break the constraints of the new table: {exc}"
+            ) from exc
+        self._execute_in_transaction(
+            connection,
+            [
+                *(f"DROP TRIGGER IF EXISTS '{name}'" for name in triggers),
+                f"DROP TABLE '{old}'",
+                f"ALTER TABLE '{new}' RENAME TO '{old}'",
+                *self._sql_table_extras(),
+            ],
+        )
+        logger.info("Rebuilt %s copying %s rows", old, self.copied)
+
+    def _copy_rows(
+        self, connection: sqlite3.Connection, columns: str, copy_values: str
+    ) -> None:
+        old, new = self.table_name, self.new_table_name
+        self.total = connection.execute(f"SELECT COUNT(*) FROM '{old}'").fetchone()[0]
+        last_rowid = 0
+        while True:
+            # One short write transaction per batch lets other connections in
+            last_rowid_batch, count = connection.execute(
+                f"SELECT MAX(rowid), COUNT(*) FROM (SELECT rowid FROM '{old}' "
+                "WHERE rowid > ? ORDER BY rowid LIMIT ?)",
+                (last_rowid, self.batch_size),
+            ).fetchone()
+            if not count:
+                break
+            self._execute_in_transaction(
+                connection,
+                [
+                    # Rows already mirrored by the triggers are newer than the
+                    # copy, any other conflict aborts the migration
+                    f"INSERT INTO '{new}'({columns}) SELECT {copy_values} "
+                    f"FROM '{old}' WHERE rowid > ? AND rowid <= ? "
+                    "ON CONFLICT(rowid) DO NOTHING"
+                ],
+                (last_rowid, last_rowid_batch),
+            )
+            last_rowid = last_rowid_batch
+            self.copied += count
+            if self.progress is not None:
+                self.progress(self.copied, self.total)
+
+
+def migrate(
+    model: type[Model],
+    batch_size: int = 1000,
+    progress: ProgressCallback | None = None,
+) -> SchemaDiff:
+    """Migrate the table of `model` on the configured database and return the
+    differences that were applied"""
+    migration = Migration(model, batch_size=batch_size, progress=progress)
+    migration.run()
+    return migration.diff
@@ -1,14 +1,25 @@
 import logging
-from typing import Any, ClassVar, TypeVar
+from typing import TYPE_CHECKING, Any, ClassVar, Iterable, Iterator, Sequence, TypeVar
 
 from pydantic import BaseModel
 
+from pyorm.backends.base import BaseBackend
+from pyorm.changes import Change
 from pyorm.database import Database
 from pyorm.exceptions import DoesNotExist, MultipleObjectsReturned
-from pyorm.utils import is_field_primary_key
+from pyorm.pagination import Page, decode_cursor, encode_cursor
+from pyorm.records import Record, make_record_class
+from pyorm.utils import (
+    is_field_nullable,
+    is_field_primary_key,
+    is_field_searchable,
+)
 
 from .utils import make_fields_optional
 
+if TYPE_CHECKING:
+    from pyorm.buffer import WriteBuffer
+
 T = TypeVar("T", bound="Model")
 
 logger = logging.getLogger("pyorm_model")
@@ -21,6 +32,9 @@ class Model(BaseModel):
         MultipleObjectsReturned
     )
     _pk_field: ClassVar[str | None] = None
+    _record_class: ClassVar[type[Record] | None] = None
+    _write_buffer: ClassVar["WriteBuffer | None"] = None
+    track_changes: ClassVar[bool] = False
 
     def model_post_init(self, context) -> None:
         self._modified_fields: list[str] = []
@@ -38,6 +52,12 @@ class Model(BaseModel):
         cls._pk_field = ""
         return ""
 
+    @classmethod
+    def get_backend(cls) -> BaseBackend:
+        backend = Database.get_backend()
+        backend.register_table(cls.table_name, cls.__pydantic_fields__)
+        return backend
+
     def clean_modified_fields(self):
         self._modified_fields = []
 
@@ -47,16 +67,117 @@ class Model(BaseModel):
             self._modified_fields.append(name)
 
     @classmethod
-    def filter(cls: type[T], _limit: None | int = None, **kwargs) -> list[T]:
-        ModelOptional: T = make_fields_optional(cls)(**kwargs)
+    def filter(
+        cls: type[T],
+        _limit: None | int = None,
+        _order_by: list[str] | None = None,
+        **kwargs,
+    ) -> list[T]:
+        return cls._select(kwargs, _limit=_limit, order_by=_order_by)
+
+    @classmethod
+    def _select(
+        cls: type[T],
+        filters: dict[str, Any],
+        _limit: None | int = None,
+        order_by: list[str] | None = None,
+        after: tuple | None = None,
+    ) -> list[T]:
+        res = cls._select_rows(filters, _limit=_limit, order_by=order_by, after=after)
+        instances: list[T] = [cls.model_validate(result) for result in res]
+        return instances
+
+    @classmethod
+    def _check_order_by(cls, order_by: Sequence[str]) -> None:
+        """Only field names may be ordered by, as they are written into SQL"""
+        for field in order_by:
+            if field.removeprefix("-") not in cls.__pydantic_fields__:
+                raise ValueError(f"Cannot order {cls.__name__} by {field!r}")
+
+    @classmethod
+    def _check_seek_fields(cls, order_by: Sequence[str]) -> None:
+        """Seeking compares the row with the cursor, which is never true when
+        either holds NULL, so pages would stop at the first NULL"""
+        for field in order_by:
+            name = field.removeprefix("-")
+            field_info = cls.__pydantic_fields__[name]
+            if is_field_nullable(field_info) and not is_field_primary_key(field_info):
+                raise ValueError(
+                    f"Cannot paginate {cls.__name__} by nullable field {name!r}"
+                )
+
+    @classmethod
+    def _select_rows(
+        cls,
+        filters: dict[str, Any],
+        _limit: None | int = None,
+        order_by: list[str] | None = None,
+        after: tuple | None = None,
+    ) -> list[dict[str, Any]]:
+        if order_by:
+            cls._check_order_by(order_by)
+        ModelOptional = make_fields_optional(cls)(**filters)
         query_fields = list(cls.__pydantic_fields__.keys())
-        res = Database.get_backend().get_many(
+        return cls.get_backend().get_many(
             cls.table_name,
             ModelOptional.model_dump(exclude_unset=True),
             query_fields=query_fields,
+            _limit=_limit,
+            order_by=order_by,
+            after=after,
         )
-        instances: list[T] = [cls.model_validate(result) for result in res]
-        return instances
+
+    @classmethod
+    def record_class(cls) -> type[Record]:
+        record_cls = cls.__dict__.get("_record_class")
+        if record_cls is None:
+            record_cls = make_record_class(cls)
+            cls._record_class = record_cls
+        return record_cls
+
+    @classmethod
+    def as_records(
+        cls,
+        _limit: None | int = None,
+        _order_by: list[str] | None = None,
+        **kwargs,
+    ) -> list[Record]:
+        """Like `filter()`, but return immutable tuple-backed records holding
+        the column values, skipping validation and per-instance state"""
+        record_cls = cls.record_class()
+        res = cls._select_rows(kwargs, _limit=_limit, order_by=_order_by)
+        make_record = record_cls._make  # type: ignore[attr-defined]
+        return [make_record(row.values()) for row in res]
+
+    @classmethod
+    def paginate_by_key(
+        cls: type[T],
+        order_by: Sequence[str],
+        page_size: int,
+        cursor: str | None = None,
+        **kwargs,
+    ) -> Page[T]:
+        """Return the page following `cursor` seeking past the last row with a
+        `(a, b) > (?, ?)` condition, so every page costs the same as the first.
+        `order_by` should end in a unique column and be covered by an index,
+        and can't include nullable fields other than the primary key"""
+        if page_size < 1:
+            raise ValueError("page_size must be at least 1")
+        cls._check_order_by(order_by)
+        cls._check_seek_fields(order_by)
+        if len({field.startswith("-") for field in order_by}) != 1:
+            raise ValueError("Keyset pagination needs a single ordering direction")
+        after = decode_cursor(cursor, cls, order_by) if cursor else None
+        instances = cls._select(
+            kwargs, _limit=page_size + 1, order_by=list(order_by), after=after
+        )
+        if len(instances) <= page_size:
+            return Page(items=instances, next_cursor=None)
+        items = instances[:page_size]
+        last_values = [
+            getattr(items[-1], field.removeprefix("-")) for field in order_by
+        ]
+        return Page(items=items, next_cursor=encode_cursor(order_by, last_values))
 
     @classmethod
     def get(cls: type[T], **kwargs) -> T:
@@ -67,15 +188,114 @@ class Model(BaseModel):
             raise DoesNotExist
         raise MultipleObjectsReturned
 
+    @classmethod
+    def upsert(
+        cls: type[T],
+        instance_or_many: T | Iterable[T],
+        conflict_fields: list[str],
+        update_fields: list[str] | None = None,
+    ) -> list[T]:
+        """Insert the instances in a single statement per batch. Rows conflicting
+        on `conflict_fields` get `update_fields` overwritten instead, or are
+        skipped when it is empty. By default these are the non-conflict fields
+        except the primary key, so existing rows keep their key.
+        Return new instances for the rows written"""
+        if isinstance(instance_or_many, Model):
+            instances: list[T] = [instance_or_many]
+        else:
+            instances = list(instance_or_many)
+        if not instances:
+            return []
+        rows = [
+            instance.model_dump(exclude_computed_fields=True) for instance in instances
+        ]
+        column_names = list(rows[0].keys())
+        if update_fields is None:
+            pk_field_name = cls.get_pk_field_name()
+            update_fields = [
+                column
+                for column in column_names
+                if column not in conflict_fields and column != pk_field_name
+            ]
+        res = cls.get_backend().upsert_items(
+            cls.table_name, rows, conflict_fields, update_fields
+        )
+        return [cls.model_validate(dict(zip(column_names, row))) for row in res]
+
+    @classmethod
+    def get_or_create(
+        cls: type[T], defaults: dict[str, Any] | None = None, **kwargs
+    ) -> tuple[T, bool]:
+        """Fetch the row matching `kwargs`, creating it with `defaults` if missing.
+        `kwargs` must match a primary key or unique constraint"""
+        instance = cls(**((defaults or {}) | kwargs))
+        created = cls.upsert(instance, conflict_fields=list(kwargs), update_fields=[])
+        if created:
+            return created[0], True
+        return cls.get(**kwargs), False
+
+    @classmethod
+    def update_or_create(
+        cls: type[T], defaults: dict[str, Any] | None = None, **kwargs
+    ) -> T:
+        """Write `defaults` to the row matching `kwargs`, creating it if missing.
+        `kwargs` must match a primary key or unique constraint"""
+        instance = cls(**((defaults or {}) | kwargs))
+        # Without defaults the conflict fields are set to themselves, so the
+        # existing row is still returned by the statement
+        update_fields = list(defaults) if defaults else list(kwargs)
+        return cls.upsert(instance, list(kwargs), update_fields)[0]
+
+    @classmethod
+    def search(
+        cls: type[T], query: str, rank: bool = True, _limit: None | int = None
+    ) -> list[T]:
+        """Full-text search the fields declared with
+        `json_schema_extra={"fts": True}`, best matches first when `rank`"""
+        if not any(is_field_searchable(field) for field in cls.model_fields.values()):
+            raise ValueError(f"{cls.__name__} has no full-text searchable fields")
+        query_fields = list(cls.__pydantic_fields__.keys())
+        res = cls.get_backend().search(
+            cls.table_name, query, query_fields, rank=rank, _limit=_limit
+        )
+        return [cls.model_validate(result) for result in res]
+
     @classmethod
     def create_model(cls: type[T]) -> None:
-        Database.get_backend().sql_create_db(cls.table_name, cls.__pydantic_fields__)
+        backend = cls.get_backend()
+        backend.sql_create_db(cls.table_name, cls.__pydantic_fields__)
+        if cls.track_changes:
+            backend.install_change_tracking(cls.table_name, cls.get_change_pk())
+
+    @classmethod
+    def get_change_pk(cls) -> str:
+        """Column identifying changed rows in the changelog"""
+        return cls.get_pk_field_name() or "rowid"
+
+    @classmethod
+    def changes_since(cls, seq: int = 0, batch_size: int = 1000) -> Iterator[Change]:
+        """Stream the changes to the table after the changelog `seq`, oldest
+        first. Needs `track_changes = True` on the model"""
+        if not cls.track_changes:
+            raise ValueError(f"{cls.__name__} doesn't track changes")
+        backend = cls.get_backend()
+        while True:
+            rows = backend.get_changes(seq, [cls.table_name], _limit=batch_size)
+            for row in rows:
+                yield Change(*row)
+            if len(rows) < batch_size:
+                return
+            seq = rows[-1][0]
 
     @classmethod
     def drop_model(cls: type[T]) -> None:
-        Database.get_backend().sql_drop_table(cls.table_name)
+        cls.get_backend().sql_drop_table(cls.table_name)
 
     def save(self) -> None:
+        write_buffer = type(self).__dict__.get("_write_buffer")
+        if write_buffer is not None:
+            write_buffer.save(self)
+            return
         pk_field_name: str = self.get_pk_field_name()
         pk: Any | None = getattr(self, pk_field_name, None)
         if pk_field_name and pk is not None and len(self._modified_fields) > 0:
@@ -83,23 +303,21 @@ class Model(BaseModel):
                 field: getattr(self, field, None) for field in self._modified_fields
             }
             filters = {pk_field_name: pk}
-            rows = Database.get_backend().update_item(
-                self.table_name, update_data, filters
-            )
+            rows = self.get_backend().update_item(self.table_name, update_data, filters)
             if rows <= 0:
                 raise DoesNotExist
             self.clean_modified_fields()
             return
         model_data: dict[str, Any] = self.model_dump(exclude_computed_fields=True)
-        res: tuple[Any] | None = Database.get_backend().insert_item(
+        res: tuple[Any] | None = self.get_backend().insert_item(
             self.table_name, model_data
         )
         if res is not None:
             model = self.model_validate(
                 {attr: value for attr, value in zip(model_data.keys(), res)}
             )
-            for attribute, value in model.model_dump().items():
-                setattr(self, attribute, value)
+            for attribute in model_data:
+                setattr(self, attribute, getattr(model, attribute))
             self.clean_modified_fields()
         else:
             logger.warning("No result was returned after insert")
@@ -114,4 +332,4 @@ class Model(BaseModel):
                 field: getattr(self, field, None)
                 for field in self.__pydantic_fields_set__
             }
-        Database.get_backend().delete_item(self.table_name, filters)
+        self.get_backend().delete_item(self.table_name, filters)
@@ -0,0 +1,61 @@
+import base64
+import binascii
+import functools
+import json
+from dataclasses import dataclass
+from typing import Any, Generic, Sequence, TypeVar
+
+from pydantic import BaseModel, TypeAdapter
+from pydantic_core import to_jsonable_python
+
+ItemT = TypeVar("ItemT")
+
+
+@dataclass(frozen=True)
+class Page(Generic[ItemT]):
+    items: list[ItemT]
+    next_cursor: str | None
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+
+def encode_cursor(order_by: Sequence[str], values: Sequence[Any]) -> str:
+    payload = {"order_by": list(order_by), "values": to_jsonable_python(values)}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+
+@functools.lru_cache(maxsize=256)
+def _field_adapter(model_cls: type[BaseModel], field: str) -> TypeAdapter | None:
+    field_info = model_cls.__pydantic_fields__.get(field)
+    if field_info is None or field_info.annotation is None:
+        return None
+    return TypeAdapter(field_info.annotation)
+
+
+def decode_cursor(
+    cursor: str, model_cls: type[BaseModel], order_by: Sequence[str]
+) -> tuple:
+    """Decode a cursor made by `encode_cursor`, validating each value against
+    the type of its field so it compares like the stored column"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise ValueError("Invalid pagination cursor") from exc
+    if (
+        not isinstance(payload, dict)
+        or not isinstance(payload.get("values"), list)
+        or len(payload["values"]) != len(order_by)
+    ):
+        raise ValueError("Invalid pagination cursor")
+    if payload.get("order_by") != list(order_by):
+        raise ValueError("Pagination cursor was created with a different order_by")
+    values = []
+    for field, value in zip(order_by, payload["values"]):
+        adapter = _field_adapter(model_cls, field.removeprefix("-"))
+        if adapter is None:
+            raise ValueError(f"Cannot paginate {model_cls.__name__} by {field!r}")
+        values.append(adapter.validate_python(value))
+    return tuple(values)
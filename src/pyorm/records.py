@@ -0,0 +1,32 @@
+from collections import namedtuple
+from typing import Any
+
+from pydantic import BaseModel
+
+
+class Record(tuple):
+    """Base of the read-only, tuple-backed rows returned by `Model.as_records()`.
+    Values are the decoded column values, `to_model()` validates them into a
+    model. Like namedtuple methods, the other attributes start with an
+    underscore so fields can't hide them; `_to_model()` is `to_model()` for
+    models with a field of that name"""
+
+    __slots__ = ()
+    _model: type[BaseModel]
+    _fields: tuple[str, ...]
+
+    def _to_model(self) -> Any:
+        return self._model.model_validate(dict(zip(self._fields, self)))
+
+    def to_model(self) -> Any:
+        return self._to_model()
+
+
+def make_record_class(model_cls: type[BaseModel]) -> type[Record]:
+    fields = list(model_cls.__pydantic_fields__.keys())
+    row_tuple = namedtuple(f"{model_cls.__name__}Row", fields)  # type: ignore[misc]
+    return type(
+        f"{model_cls.__name__}Record",
+        (row_tuple, Record),
+        {"__slots__": (), "_model": model_cls},
+    )
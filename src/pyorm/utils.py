@@ -1,4 +1,5 @@
-from typing import Annotated
+import types
+from typing import Annotated, Any, Union, get_args, get_origin
 
 from pydantic import BaseModel, Field, create_model
 from pydantic.fields import FieldInfo
@@ -27,6 +28,31 @@ def make_fields_optional[ModelTypeT: type[BaseModel]](
     )
 
 
-def is_field_primary_key(field: FieldInfo) -> bool:
+def get_field_option(field: FieldInfo, option: str) -> Any:
     schema = field.json_schema_extra
-    return bool(schema and isinstance(schema, dict) and schema.get("primary_key"))
+    if schema and isinstance(schema, dict):
+        return schema.get(option)
+    return None
+
+
+def is_field_primary_key(field: FieldInfo) -> bool:
+    return bool(get_field_option(field, "primary_key"))
+
+
+def is_field_unique(field: FieldInfo) -> bool:
+    return bool(get_field_option(field, "unique"))
+
+
+def is_field_indexed(field: FieldInfo) -> bool:
+    return bool(get_field_option(field, "index"))
+
+
+def is_field_searchable(field: FieldInfo) -> bool:
+    return bool(get_field_option(field, "fts"))
+
+
+def is_field_nullable(field: FieldInfo) -> bool:
+    origin = get_origin(field.annotation)
+    return origin in (Union, types.UnionType) and type(None) in get_args(
+        field.annotation
+    )
@@ -0,0 +1,14 @@
+from typing import Generator
+
+import pytest
+
+from pyorm.backends.memory import InMemoryBackend
+from pyorm.database import Database
+
+
+@pytest.fixture(autouse=True, scope="function")
+def memory_backend() -> Generator[InMemoryBackend, None, None]:
+    instance = InMemoryBackend()
+    Database.configure_database(instance)
+    yield instance
+    Database.configure_database(None)
@@ -0,0 +1,197 @@
+import datetime
+import decimal
+from typing import ClassVar
+
+import pytest
+from pydantic import BaseModel, Field
+
+from pyorm.backends.memory import InMemoryBackend
+from pyorm.buffer import WriteBuffer
+from pyorm.exceptions import IntegrityError
+from pyorm.models import Model
+
+
+class Tag(BaseModel):
+    name: str
+
+
+class Movie(Model):
+    table_name: ClassVar[str] = "test_movie_memory"
+    id: int | None = Field(default=None, json_schema_extra={"primary_key": True})
+    slug: str = Field(json_schema_extra={"unique": True})
+    year: int = Field(json_schema_extra={"index": True})
+    score: float
+    budget: decimal.Decimal = decimal.Decimal("0")
+    released: datetime.date | None = None
+    tags: list[Tag] = []
+
+
+def create_movies(count: int) -> None:
+    Movie.create_model()
+    for i in range(count):
+        Movie(slug=f"movie-{i}", year=2000 + i % 3, score=i / 2).save()
+
+
+def test_insert_get_update_delete():
+    Movie.create_model()
+    movie = Movie(
+        slug="alien",
+        year=1979,
+        score=8.5,
+        budget=decimal.Decimal("11.5"),
+        released=datetime.date(1979, 5, 25),
+        tags=[Tag(name="horror")],
+    )
+    movie.save()
+    assert movie.id == 1
+    fetched = Movie.get(id=1)
+    assert fetched == movie
+    assert fetched.tags[0].name == "horror"
+    fetched.score = 9.0
+    fetched.save()
+    assert Movie.get(slug="alien").score == 9.0
+    with pytest.raises(Movie.DoesNotExist):
+        Movie.get(slug="aliens")
+    fetched.delete()
+    assert Movie.filter() == []
+
+
+def test_filter_order_and_limit():
+    create_movies(9)
+    assert len(Movie.filter(year=2001)) == 3
+    assert Movie.filter(released=None, year=2002, score=2.5)[0].slug == "movie-5"
+    movies = Movie.filter(_order_by=["-year", "id"], _limit=4)
+    assert [(m.year, m.id) for m in movies] == [
+        (2002, 3),
+        (2002, 6),
+        (2002, 9),
+        (2001, 2),
+    ]
+    with pytest.raises(Movie.MultipleObjectsReturned):
+        Movie.get(year=2000)
+
+
+def test_paginate_by_key():
+    create_movies(10)
+    page = Movie.paginate_by_key(["year", "id"], page_size=4)
+    seen = [m.id for m in page.items]
+    while page.has_next:
+        page = Movie.paginate_by_key(["year", "id"], 4, cursor=page.next_cursor)
+        seen.extend(m.id for m in page.items)
+    expected = [m.id for m in Movie.filter(_order_by=["year", "id"])]
+    assert seen == expected
+
+
+def test_autoincrement_and_explicit_keys():
+    Movie.create_model()
+    Movie(id=10, slug="a", year=2000, score=1).save()
+    movie = Movie(slug="b", year=2000, score=1)
+    movie.save()
+    assert movie.id == 11
+    with pytest.raises(IntegrityError):
+        Movie(id=10, slug="c", year=2000, score=1).save()
+
+
+def test_constraints_roll_back_batches(memory_backend: InMemoryBackend):
+    create_movies(3)
+    with pytest.raises(IntegrityError):
+        Movie(slug="movie-1", year=2000, score=1).save()
+    with pytest.raises(IntegrityError):
+        memory_backend.write_many(
+            Movie.table_name,
+            [{"slug": "new", "year": 2000, "score": 1.0}],
+            [({"slug": "movie-0"}, {"id": 2})],
+        )
+    assert [m.slug for m in Movie.filter()] == ["movie-0", "movie-1", "movie-2"]
+    with pytest.raises(IntegrityError):
+        memory_backend.update_item(Movie.table_name, {"slug": "same"}, {})
+    assert Movie.get(id=1).slug == "movie-0"
+    # The indexes were rolled back with the rows
+    assert Movie.filter(slug="new") == []
+    assert len(Movie.filter(year=2000)) == 1
+
+
+def test_upsert_and_get_or_create():
+    create_movies(2)
+    movies = Movie.upsert(
+        [
+            Movie(slug="movie-0", year=1999, score=5),
+            Movie(slug="movie-9", year=2009, score=9),
+        ],
+        conflict_fields=["slug"],
+        update_fields=["year"],
+    )
+    assert [(m.id, m.slug, m.year, m.score) for m in movies] == [
+        (1, "movie-0", 1999, 0.0),
+        (3, "movie-9", 2009, 9.0),
+    ]
+    movie, created = Movie.get_or_create(
+        slug="movie-1", defaults={"year": 1, "score": 1}
+    )
+    assert (movie.id, created) == (2, False)
+    movie = Movie.update_or_create(slug="movie-1", defaults={"year": 1, "score": 7})
+    assert Movie.get(id=2).score == 7
+    with pytest.raises(ValueError):
+        Movie.upsert(movie, conflict_fields=["year"])
+
+
+def test_indexes_follow_writes(memory_backend: InMemoryBackend):
+    create_movies(6)
+    index = memory_backend.get_table(Movie.table_name).indexes["year"]
+    assert {year: len(ids) for year, ids in index.items()} == {
+        2000: 2,
+        2001: 2,
+        2002: 2,
+    }
+    movie = Movie.get(id=1)
+    movie.year = 2001
+    movie.save()
+    movie.delete()
+    assert {year: len(ids) for year, ids in index.items()} == {
+        2000: 1,
+        2001: 2,
+        2002: 2,
+    }
+
+
+def test_snapshot_and_restore(memory_backend: InMemoryBackend):
+    create_movies(3)
+    snapshot = memory_backend.snapshot()
+    movie = Movie.get(id=1)
+    movie.score = 100
+    movie.save()
+    Movie.get(id=2).delete()
+    Movie(slug="new", year=2000, score=1).save()
+    memory_backend.restore(snapshot)
+    assert [(m.id, m.score) for m in Movie.filter()] == [(1, 0.0), (2, 0.5), (3, 1.0)]
+    assert Movie.filter(slug="new") == []
+    Movie(slug="other", year=2000, score=1).save()
+    memory_backend.restore(snapshot)
+    assert len(Movie.filter()) == 3
+
+
+def test_records_and_write_buffer():
+    Movie.create_model()
+    with WriteBuffer(Movie, max_delay=60).attach() as buffer:
+        for i in range(5):
+            Movie(slug=f"movie-{i}", year=2000, score=i).save()
+        buffer.flush()
+    records = Movie.as_records(_order_by=["-score"], _limit=2)
+    assert [record.slug for record in records] == ["movie-4", "movie-3"]
+    Movie.drop_model()
+    with pytest.raises(ValueError):
+        Movie.filter()
+
+
+def test_values_are_stored_encoded(memory_backend: InMemoryBackend):
+    Movie.create_model()
+    movie = Movie(slug="alien", year=1979, score=8.5, tags=[Tag(name="space")])
+    movie.budget = decimal.Decimal(900.09)
+    movie.save()
+    movie.tags.append(Tag(name="horror"))
+    stored = Movie.get(slug="alien")
+    assert stored.budget == decimal.Decimal("900.09")
+    assert stored.tags == [Tag(name="space")]
+    row = next(iter(memory_backend.tables[Movie.table_name].rows.values()))
+    assert row["tags"] == '[{"name":"space"}]'
+    assert Movie.filter(budget=decimal.Decimal("900.09")) == [stored]
@@ -0,0 +1,13 @@
+import pytest
+
+from pyorm.backends.sharded import ShardedBackend
+from pyorm.database import Database
+
+
+@pytest.fixture(scope="function")
+def sharded_backend():
+    instance = ShardedBackend.from_paths([":memory:"] * 3, shard_key="id")
+    Database.configure_database(instance)
+    yield instance
+    Database.configure_database(None)
+    del instance
@@ -0,0 +1,122 @@
+from typing import ClassVar
+
+import pytest
+from pydantic import Field
+
+from pyorm.backends.sharded import ShardedBackend
+from pyorm.models import Model
+
+
+class Movie(Model):
+    table_name: ClassVar[str] = "test_movie_sharding"
+    id: int = Field(json_schema_extra={"primary_key": True})
+    title: str
+    year: int
+
+
+def count_rows(backend: ShardedBackend) -> list[int]:
+    counts = []
+    for connection in backend.get_connection():
+        cursor = connection.execute(f"SELECT COUNT(*) FROM {Movie.table_name}")
+        counts.append(cursor.fetchone()[0])
+    return counts
+
+
+def test_create_and_insert_route_by_shard_key(sharded_backend: ShardedBackend):
+    Movie.create_model()
+    for i in range(9):
+        Movie(id=i, title=f"Movie {i}", year=2000 + i).save()
+    assert count_rows(sharded_backend) == [3, 3, 3]
+    movie = Movie.get(id=4)
+    assert movie.title == "Movie 4"
+    assert sharded_backend.shard_for(4) is sharded_backend.shards[1]
+
+
+def test_scatter_gather_ordering_and_limit(sharded_backend: ShardedBackend):
+    Movie.create_model()
+    for i in range(10):
+        Movie(id=i, title=f"Movie {i}", year=2000 + i % 4).save()
+    movies = Movie.filter(_order_by=["-year", "id"], _limit=4)
+    assert [(m.year, m.id) for m in movies] == [
+        (2003, 3),
+        (2003, 7),
+        (2002, 2),
+        (2002, 6),
+    ]
+    assert len(Movie.filter(year=2001)) == 3
+
+
+def test_update_and_delete(sharded_backend: ShardedBackend):
+    Movie.create_model()
+    for i in range(6):
+        Movie(id=i, title=f"Movie {i}", year=1999).save()
+    movie = Movie.get(id=5)
+    movie.title = "Renamed"
+    movie.save()
+    assert Movie.get(id=5).title == "Renamed"
+    assert sharded_backend.update_item(Movie.table_name, {"year": 2000}, {}) == 6
+    Movie.get(id=2).delete()
+    assert len(Movie.filter(year=2000)) == 5
+
+
+def test_insert_without_shard_key():
+    class Book(Model):
+        table_name: ClassVar[str] = "test_book_sharding"
+        id: int | None = Field(default=None, json_schema_extra={"primary_key": True})
+        title: str
+
+    backend = ShardedBackend.from_paths([":memory:"] * 2, shard_key="id")
+    with pytest.raises(ValueError):
+        backend.insert_item(Book.table_name, {"id": None, "title": "Book"})
+
+
+def test_range_sharding():
+    backend = ShardedBackend.from_paths([":memory:"] * 3, "year", ranges=[1990, 2010])
+    assert backend.shard_index(1950) == 0
+    assert backend.shard_index(1990) == 1
+    assert backend.shard_index(2024) == 2
+
+
+def test_upsert_routes_by_shard_key(sharded_backend: ShardedBackend):
+    Movie.create_model()
+    Movie(id=1, title="Movie 1", year=2000).save()
+    movies = Movie.upsert(
+        [Movie(id=i, title=f"New {i}", year=2001) for i in range(4)],
+        conflict_fields=["id"],
+    )
+    assert sorted(m.id for m in movies) == [0, 1, 2, 3]
+    assert Movie.get(id=1).title == "New 1"
+    assert count_rows(sharded_backend) == [2, 1, 1]
+
+
+def test_search_scatters_to_shards(sharded_backend: ShardedBackend):
+    class Article(Model):
+        table_name: ClassVar[str] = "test_article_sharding"
+        id: int = Field(json_schema_extra={"primary_key": True})
+        body: str = Field(json_schema_extra={"fts": True})
+
+    Article.create_model()
+    for i in range(6):
+        Article(id=i, body="sqlite " * (i + 1) + "padding " * 10).save()
+    articles = Article.search("sqlite", _limit=3)
+    assert len(articles) == 3
+    assert {a.id for a in Article.search("sqlite")} == set(range(6))
+
+
+def test_write_many_reports_missed_updates(sharded_backend: ShardedBackend):
+    Movie.create_model()
+    missed = sharded_backend.write_many(
+        Movie.table_name,
+        [{"id": i, "title": f"Movie {i}", "year": 2000} for i in range(3)],
+        [],
+    )
+    assert missed == []
+    updates = [
+        ({"year": 2001}, {"id": 1}),
+        ({"year": 2001}, {"id": 7}),
+        ({"year": 2002}, {"title": "Movie 2"}),
+        ({"year": 2002}, {"title": "Missing"}),
+    ]
+    missed = sharded_backend.write_many(Movie.table_name, [], updates)
+    assert missed == [updates[1], updates[3]]
+    assert [m.year for m in Movie.filter(_order_by=["id"])] == [2000, 2001, 2002]
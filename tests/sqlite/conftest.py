@@ -3,6 +3,8 @@ from typing import Generator
 
 import pytest
 
+from pyorm.backends.base import BaseBackend
+from pyorm.backends.memory import InMemoryBackend
 from pyorm.backends.sqlite import SQLiteBackend
 from pyorm.database import Database
 
@@ -21,3 +23,12 @@ def prepare_sqlite_database():
     yield
     Database.configure_database(None)
     del instance
+
+
+@pytest.fixture(params=["sqlite", "memory"])
+def backend(request, prepare_sqlite_database) -> BaseBackend:
+    """Run a model-level test on each backend. Assertions reading the SQLite
+    connection directly are skipped for the in-memory backend"""
+    if request.param == "memory":
+        Database.configure_database(InMemoryBackend())
+    return Database.get_backend()
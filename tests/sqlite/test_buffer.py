@@ -0,0 +1,156 @@
+import queue
+import sqlite3
+import threading
+import time
+from typing import ClassVar
+
+import pytest
+from pydantic import Field
+
+from pyorm.backends.sqlite import SQLiteBackend
+from pyorm.buffer import WriteBuffer
+from pyorm.database import Database
+from pyorm.models import Model
+
+
+class Reading(Model):
+    table_name: ClassVar[str] = "test_reading_buffer"
+    id: int | None = Field(default=None, json_schema_extra={"primary_key": True})
+    sensor: str
+    value: float
+
+
+@pytest.fixture
+def backend():
+    instance = SQLiteBackend(":memory:", check_same_thread=False)
+    Database.configure_database(instance)
+    Reading.create_model()
+    yield instance
+
+
+def test_flush_writes_batch(backend: SQLiteBackend):
+    with WriteBuffer(Reading, max_delay=60).attach() as buffer:
+        for i in range(10):
+            Reading(sensor=f"s{i}", value=i).save()
+        assert buffer.pending == 10
+        assert Reading.filter() == []
+        buffer.flush()
+        assert buffer.pending == 0
+        assert len(Reading.filter()) == 10
+    assert Reading.__dict__.get("_write_buffer") is None
+
+
+def test_updates_are_coalesced(backend: SQLiteBackend):
+    reading = Reading(id=1, sensor="s1", value=0)
+    reading.save()
+    with WriteBuffer(Reading, max_delay=60).attach() as buffer:
+        for value in range(1, 6):
+            reading.value = value
+            reading.save()
+        new_reading = Reading(id=2, sensor="s2", value=0)
+        new_reading.save()
+        new_reading.sensor = "s2b"
+        new_reading.save()
+        assert buffer.pending == 2
+    assert Reading.get(id=1).value == 5
+    assert Reading.get(id=2).sensor == "s2b"
+
+
+def test_resaving_new_instances(backend: SQLiteBackend):
+    with WriteBuffer(Reading, max_delay=60).attach() as buffer:
+        reading = Reading(sensor="s1", value=0)
+        reading.save()
+        reading.value = 1
+        reading.save()
+        reading.sensor = "s1b"
+        reading.save()
+        assert buffer.pending == 1
+        buffer.flush()
+        assert [(r.sensor, r.value) for r in Reading.filter()] == [("s1b", 1)]
+        reading.value = 2
+        with pytest.raises(RuntimeError):
+            reading.save()
+        stored = Reading.get(sensor="s1b")
+        stored.value = 2
+        stored.save()
+    assert Reading.get(id=stored.id).value == 2
+    assert len(Reading.filter()) == 1
+
+
+def test_background_flush_by_size_and_time(backend: SQLiteBackend):
+    with WriteBuffer(Reading, max_size=5, max_delay=0.01) as buffer:
+        for i in range(12):
+            buffer.save(Reading(sensor="s", value=i))
+        for _ in range(100):
+            if buffer.pending == 0:
+                break
+            time.sleep(0.01)
+        assert buffer.pending == 0
+        assert len(Reading.filter()) == 12
+
+
+def test_backpressure(backend: SQLiteBackend):
+    buffer = WriteBuffer(Reading, max_size=2, max_delay=60, max_queue=2)
+    release = threading.Event()
+    writing = threading.Event()
+    write_many = backend.write_many
+
+    def slow_write_many(*args):
+        writing.set()
+        release.wait()
+        write_many(*args)
+
+    backend.write_many = slow_write_many  # type: ignore[method-assign]
+    buffer.block_timeout = 0.05
+    buffer.save(Reading(sensor="a", value=1))
+    buffer.save(Reading(sensor="b", value=2))
+    writing.wait()
+    buffer.save(Reading(sensor="c", value=3))
+    buffer.save(Reading(sensor="d", value=4))
+    with pytest.raises(queue.Full):
+        buffer.save(Reading(sensor="e", value=5))
+    release.set()
+    buffer.close()
+    assert len(Reading.filter()) == 4
+
+
+def test_errors(backend: SQLiteBackend):
+    Reading(id=1, sensor="s1", value=0).save()
+    failures = []
+    buffer = WriteBuffer(
+        Reading, max_delay=60, on_error=lambda exc, *batch: failures.append(batch)
+    )
+    buffer.save(Reading(id=1, sensor="s1", value=1))
+    buffer.flush()
+    assert len(failures) == 1
+    assert failures[0][0][0]["value"] == 1
+    buffer.close()
+    with pytest.raises(RuntimeError):
+        buffer.save(Reading(sensor="s2", value=1))
+
+    buffer = WriteBuffer(Reading, max_delay=60)
+    buffer.save(Reading(id=1, sensor="s1", value=1))
+    with pytest.raises(sqlite3.IntegrityError):
+        buffer.flush()
+    buffer.close()
+
+
+def test_update_of_missing_row(backend: SQLiteBackend):
+    failures = []
+    buffer = WriteBuffer(
+        Reading, max_delay=60, on_error=lambda *failure: failures.append(failure)
+    )
+    reading = Reading(id=5, sensor="s5", value=0)
+    reading.value = 1
+    buffer.save(reading)
+    buffer.flush()
+    [(exc, inserts, updates)] = failures
+    assert isinstance(exc, Reading.DoesNotExist)
+    assert (inserts, updates) == ([], [({"value": 1}, {"id": 5})])
+    buffer.close()
+
+    with WriteBuffer(Reading, max_delay=60) as buffer:
+        reading.value = 2
+        buffer.save(reading)
+        with pytest.raises(Reading.DoesNotExist):
+            buffer.flush()
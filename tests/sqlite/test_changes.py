@@ -0,0 +1,151 @@
+from typing import ClassVar
+
+import pytest
+from pydantic import Field
+
+from pyorm.backends.sqlite import SQLiteBackend
+from pyorm.changes import Change, ChangePoller
+from pyorm.database import Database
+from pyorm.migrations import Migration, migrate
+from pyorm.models import Model
+
+
+class Account(Model):
+    table_name: ClassVar[str] = "test_account_changes"
+    track_changes: ClassVar[bool] = True
+    id: int | None = Field(default=None, json_schema_extra={"primary_key": True})
+    name: str
+
+
+class Untracked(Model):
+    table_name: ClassVar[str] = "test_untracked_changes"
+    id: int | None = Field(default=None, json_schema_extra={"primary_key": True})
+    name: str
+
+
+@pytest.fixture
+def tables():
+    Account.create_model()
+    Untracked.create_model()
+
+
+def test_writes_are_logged(tables):
+    account = Account(name="a")
+    account.save()
+    account.name = "b"
+    account.save()
+    Untracked(name="x").save()
+    account.delete()
+    assert [(c.pk, c.op) for c in Account.changes_since()] == [
+        (1, "insert"),
+        (1, "update"),
+        (1, "delete"),
+    ]
+    assert all(c.table_name == Account.table_name for c in Account.changes_since())
+
+
+def test_changes_since_streams_in_batches(tables):
+    for i in range(25):
+        Account(name=f"a{i}").save()
+    changes = list(Account.changes_since(batch_size=10))
+    assert [change.pk for change in changes] == list(range(1, 26))
+    assert [change.pk for change in Account.changes_since(changes[19].seq)] == [
+        21,
+        22,
+        23,
+        24,
+        25,
+    ]
+
+
+def test_primary_key_change_logs_old_key(tables, db_connection):
+    Account(id=1, name="a").save()
+    with db_connection:
+        db_connection.execute(f"UPDATE '{Account.table_name}' SET id = 2")
+    assert [(c.pk, c.op) for c in Account.changes_since()] == [
+        (1, "insert"),
+        (1, "delete"),
+        (2, "update"),
+    ]
+
+
+def test_compact_changelog(tables):
+    first = Account(name="a")
+    first.save()
+    for name in "bcd":
+        first.name = name
+        first.save()
+    Account(name="z").save()
+    backend = Database.get_backend()
+    assert backend.compact_changelog() == 3
+    changes = list(Account.changes_since())
+    assert [(c.pk, c.op) for c in changes] == [(1, "update"), (2, "insert")]
+    assert backend.compact_changelog(before_seq=changes[0].seq) == 1
+    assert [c.pk for c in Account.changes_since()] == [2]
+
+
+def test_poller_sees_other_connections(tmp_path):
+    path = str(tmp_path / "changes.db")
+    writer = SQLiteBackend(path)
+    Database.configure_database(writer)
+    Account.create_model()
+    reader = SQLiteBackend(path, check_same_thread=False)
+    Database.configure_database(reader)
+    received: list[list[Change]] = []
+    poller = ChangePoller([Account], received.append)
+    assert poller.poll() == []
+
+    Database.configure_database(writer)
+    Account(name="a").save()
+    Account(name="b").save()
+    Database.configure_database(reader)
+    changes = poller.poll()
+    assert [(c.pk, c.op) for c in changes] == [(1, "insert"), (2, "insert")]
+    assert received == [changes]
+    # Nothing was committed since, so the changelog isn't queried again
+    assert poller.poll() == []
+    assert len(received) == 1
+
+
+def test_rebuild_keeps_change_tracking(tables):
+    class AccountV2(Model):
+        table_name: ClassVar[str] = Account.table_name
+        track_changes: ClassVar[bool] = True
+        id: int | None = Field(default=None, json_schema_extra={"primary_key": True})
+        name: str = Field(json_schema_extra={"unique": True})
+
+    Account(name="a").save()
+    migration = Migration(AccountV2)
+    assert migration.diff.needs_rebuild
+    migration.run()
+    AccountV2(name="b").save()
+    assert [(c.pk, c.op) for c in Account.changes_since()] == [
+        (1, "insert"),
+        (2, "insert"),
+    ]
+
+
+def test_migration_installs_change_tracking(db_connection):
+    Untracked.create_model()
+    Untracked(name="a").save()
+
+    class TrackedLater(Untracked):
+        track_changes: ClassVar[bool] = True
+
+    diff = migrate(TrackedLater)
+    assert diff.missing_change_tracking
+    assert migrate(TrackedLater).is_empty
+    Untracked(name="b").save()
+    assert [(c.pk, c.op) for c in TrackedLater.changes_since()] == [(2, "insert")]
+
+
+def test_changelog_not_created_yet():
+    Untracked.create_model()
+    backend = Database.get_backend()
+    poller = ChangePoller([Account], callback=lambda changes: None)
+    assert poller.seq == 0
+    assert poller.poll() == []
+    assert list(Account.changes_since()) == []
+    assert backend.compact_changelog() == 0
+    with pytest.raises(ValueError):
+        list(Untracked.changes_since())
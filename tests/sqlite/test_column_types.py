@@ -0,0 +1,172 @@
+import datetime
+import decimal
+import enum
+import ipaddress
+import uuid
+from sqlite3 import Connection
+from typing import ClassVar
+
+from pydantic import BaseModel, Field
+
+from pyorm.backends.column_types import ColumnType
+from pyorm.database import Database
+from pyorm.models import Model
+
+
+class Status(enum.Enum):
+    DRAFT = "draft"
+    PUBLISHED = "published"
+
+
+class Priority(enum.Enum):
+    LOW = 1
+    HIGH = 2
+
+
+class Metadata(BaseModel):
+    tags: list[str]
+    rating: int
+
+
+class Document(Model):
+    table_name: ClassVar[str] = "test_document_types"
+    id: int | None = Field(default=None, json_schema_extra={"primary_key": True})
+    uid: uuid.UUID
+    created: datetime.datetime
+    day: datetime.date
+    status: Status
+    priority: Priority
+    extra: dict[str, int]
+    tags: list[str]
+    metadata: Metadata | None = None
+    budget: decimal.Decimal
+    is_public: bool
+
+
+def make_document(**kwargs) -> Document:
+    values = dict(
+        uid=uuid.UUID(int=1),
+        created=datetime.datetime(2024, 1, 2, 3, 4, 5),
+        day=datetime.date(2024, 1, 2),
+        status=Status.DRAFT,
+        priority=Priority.HIGH,
+        extra={"a": 1},
+        tags=["x", "y"],
+        metadata=Metadata(tags=["m"], rating=5),
+        budget=decimal.Decimal("10.25"),
+        is_public=True,
+    )
+    return Document(**(values | kwargs))
+
+
+def test_column_affinities(db_connection: Connection):
+    Document.create_model()
+    cursor = db_connection.execute(f"PRAGMA table_info({Document.table_name})")
+    column_types = {column[1]: column[2] for column in cursor.fetchall()}
+    assert column_types == {
+        "id": "INTEGER",
+        "uid": "TEXT",
+        "created": "TEXT",
+        "day": "TEXT",
+        "status": "TEXT",
+        "priority": "INTEGER",
+        "extra": "TEXT",
+        "tags": "TEXT",
+        "metadata": "TEXT",
+        "budget": "NUMERIC",
+        "is_public": "INTEGER",
+    }
+
+
+def test_round_trip(db_connection: Connection):
+    Document.create_model()
+    document = make_document()
+    document.save()
+    row = db_connection.execute(
+        f"SELECT uid, created, status, priority, extra, metadata "
+        f"FROM {Document.table_name}"
+    ).fetchone()
+    assert row == (
+        str(uuid.UUID(int=1)),
+        "2024-01-02T03:04:05",
+        "draft",
+        2,
+        '{"a":1}',
+        '{"tags":["m"],"rating":5}',
+    )
+    assert Document.get(id=document.id) == document
+    record = Document.as_records()[0]
+    assert record.created == datetime.datetime(2024, 1, 2, 3, 4, 5)
+    assert record.status is Status.DRAFT
+    assert record.is_public is True
+    assert record.budget == decimal.Decimal("10.25")
+
+
+def test_filter_update_and_upsert(db_connection: Connection):
+    Document.create_model()
+    make_document().save()
+    make_document(uid=uuid.UUID(int=2), status=Status.PUBLISHED).save()
+    document = Document.get(status=Status.PUBLISHED)
+    assert document.uid == uuid.UUID(int=2)
+    document.created = datetime.datetime(2025, 1, 1)
+    document.save()
+    assert Document.get(created=datetime.datetime(2025, 1, 1)).id == document.id
+    documents = Document.upsert(
+        [make_document(id=1, tags=["z"]), make_document(id=3)],
+        conflict_fields=["id"],
+    )
+    assert [d.tags for d in documents] == [["z"], ["x", "y"]]
+    page = Document.paginate_by_key(("created", "id"), page_size=1)
+    page = Document.paginate_by_key(
+        ("created", "id"), page_size=2, cursor=page.next_cursor
+    )
+    assert [d.id for d in page.items] == [3, 2]
+
+
+def test_register_custom_type(db_connection: Connection):
+    class Host(Model):
+        table_name: ClassVar[str] = "test_host_types"
+        address: ipaddress.IPv4Address
+
+    backend = Database.get_backend()
+    backend.column_types.register(
+        ipaddress.IPv4Address,
+        ColumnType("INTEGER", encoder=int, decoder=ipaddress.IPv4Address),
+    )
+    Host.create_model()
+    Host(address=ipaddress.IPv4Address("10.0.0.1")).save()
+    row = db_connection.execute("SELECT address FROM test_host_types").fetchone()
+    assert row == (167772161,)
+    assert Host.as_records()[0].address == ipaddress.IPv4Address("10.0.0.1")
+    assert Host.get(address=ipaddress.IPv4Address("10.0.0.1"))
+
+
+def test_codec_follows_model_fields(db_connection: Connection):
+    class Event(Model):
+        table_name: ClassVar[str] = "test_event_types"
+        value: str
+
+    class TypedEvent(Model):
+        table_name: ClassVar[str] = "test_event_types"
+        value: Status
+
+    Event.create_model()
+    Event(value="draft").save()
+    assert TypedEvent.as_records()[0].value is Status.DRAFT
+    assert Event.as_records()[0].value == "draft"
+
+
+def test_type_registered_after_table_is_used(db_connection: Connection):
+    class Gateway(Model):
+        table_name: ClassVar[str] = "test_gateway_types"
+        id: int | None = Field(default=None, json_schema_extra={"primary_key": True})
+        address: ipaddress.IPv4Address
+
+    Gateway.create_model()
+    backend = Database.get_backend()
+    backend.column_types.register(
+        ipaddress.IPv4Address,
+        ColumnType("TEXT", encoder=str, decoder=ipaddress.IPv4Address),
+    )
+    Gateway(address=ipaddress.IPv4Address("10.0.0.1")).save()
+    assert Gateway.get(id=1).address == ipaddress.IPv4Address("10.0.0.1")
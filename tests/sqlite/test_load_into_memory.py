@@ -0,0 +1,115 @@
+import gc
+import sqlite3
+import time
+import weakref
+from pathlib import Path
+from typing import ClassVar
+
+import pytest
+from pydantic import Field
+
+from pyorm.backends.sqlite import SQLiteBackend
+from pyorm.database import Database
+from pyorm.models import Model
+
+
+class City(Model):
+    table_name: ClassVar[str] = "test_city_memory"
+    id: int | None = Field(default=None, json_schema_extra={"primary_key": True})
+    name: str = Field(json_schema_extra={"index": True})
+
+
+def count_on_disk(path: Path) -> int:
+    connection = sqlite3.connect(path)
+    try:
+        query = f"SELECT COUNT(*) FROM '{City.table_name}'"
+        return connection.execute(query).fetchone()[0]
+    finally:
+        connection.close()
+
+
+@pytest.fixture
+def path(tmp_path: Path) -> Path:
+    path = tmp_path / "cities.db"
+    backend = SQLiteBackend(str(path))
+    Database.configure_database(backend)
+    City.create_model()
+    City.upsert([City(name=f"City {i}") for i in range(50)], ["id"])
+    backend.close()
+    return path
+
+
+def test_reads_from_memory_and_checkpoints(path: Path):
+    backend = SQLiteBackend(str(path), load_into_memory=True)
+    Database.configure_database(backend)
+    assert City.get(name="City 7").id == 8
+    City(name="New city").save()
+    assert len(City.filter()) == 51
+    assert count_on_disk(path) == 50
+    assert backend.checkpoint() is True
+    assert backend.checkpoint() is False
+    assert count_on_disk(path) == 51
+    City.get(name="City 0").delete()
+    backend.close()
+    assert count_on_disk(path) == 50
+
+
+def test_memory_footprint(path: Path):
+    backend = SQLiteBackend(str(path), load_into_memory=True, profile="throughput")
+    footprint = backend.get_memory_footprint()
+    assert footprint.page_count > 0
+    assert footprint.size == footprint.page_count * footprint.page_size
+    assert footprint.size == path.stat().st_size
+    assert footprint.warmup_time > 0
+    backend.close()
+    assert SQLiteBackend(str(path)).get_memory_footprint().warmup_time == 0
+
+
+def test_scheduled_checkpoints(path: Path):
+    backend = SQLiteBackend(
+        str(path),
+        load_into_memory=True,
+        check_same_thread=False,
+        checkpoint_interval=0.01,
+    )
+    Database.configure_database(backend)
+    City(name="New city").save()
+    deadline = time.monotonic() + 5
+    while count_on_disk(path) != 51 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert count_on_disk(path) == 51
+    backend.close()
+
+
+def test_invalid_options(path: Path):
+    with pytest.raises(ValueError):
+        SQLiteBackend(str(path), checkpoint_interval=1)
+    with pytest.raises(ValueError):
+        SQLiteBackend(str(path), load_into_memory=True, checkpoint_interval=1)
+
+
+def test_schema_changes_are_checkpointed(tmp_path: Path):
+    path = tmp_path / "empty.db"
+    backend = SQLiteBackend(str(path), load_into_memory=True)
+    Database.configure_database(backend)
+    City.create_model()
+    backend.close()
+    backend.close()
+    assert count_on_disk(path) == 0
+
+
+def test_collected_backend_is_checkpointed(path: Path):
+    backend = SQLiteBackend(
+        str(path),
+        load_into_memory=True,
+        check_same_thread=False,
+        checkpoint_interval=60,
+    )
+    Database.configure_database(backend)
+    City(name="New city").save()
+    Database.configure_database(None)
+    ref = weakref.ref(backend)
+    del backend
+    gc.collect()
+    assert ref() is None
+    assert count_on_disk(path) == 51
@@ -0,0 +1,164 @@
+import decimal
+import threading
+from pathlib import Path
+from sqlite3 import Connection
+from typing import ClassVar
+
+import pytest
+from pydantic import Field
+
+from pyorm.backends.memory import InMemoryBackend
+from pyorm.backends.sqlite import SQLiteBackend
+from pyorm.database import Database
+from pyorm.exceptions import MigrationError
+from pyorm.migrations import Migration, diff_model, migrate
+from pyorm.models import Model
+
+
+class MovieV1(Model):
+    table_name: ClassVar[str] = "test_movie_migrations"
+    id: int | None = Field(default=None, json_schema_extra={"primary_key": True})
+    title: str
+    year: int
+
+
+def column_names(connection: Connection) -> list[str]:
+    rows = connection.execute(f"PRAGMA table_info({MovieV1.table_name})")
+    return [row[1] for row in rows.fetchall()]
+
+
+def test_migrate_creates_missing_table(db_connection: Connection):
+    diff = migrate(MovieV1)
+    assert diff.table_exists is False
+    assert column_names(db_connection) == ["id", "title", "year"]
+    assert diff_model(MovieV1, Database.get_backend()).is_empty
+
+
+def test_add_column_and_index_in_place(db_connection: Connection):
+    MovieV1.create_model()
+    MovieV1(title="Movie 1", year=1997).save()
+
+    class MovieV2(MovieV1):
+        year: int = Field(json_schema_extra={"index": True})
+        description: str | None = None
+        score: float = 5.0
+
+    diff = migrate(MovieV2)
+    assert diff.added == ["description", "score"]
+    assert diff.missing_indexes == ["year"]
+    assert not diff.needs_rebuild
+    movie = MovieV2.get(id=1)
+    assert (movie.title, movie.description, movie.score) == ("Movie 1", None, 5.0)
+    indexes = db_connection.execute(f"PRAGMA index_list({MovieV1.table_name})")
+    assert [index[1] for index in indexes.fetchall()] == [
+        f"idx_{MovieV1.table_name}_year"
+    ]
+
+
+def test_rebuild_in_batches(db_connection: Connection):
+    MovieV1.create_model()
+    MovieV1.upsert(
+        [MovieV1(id=i, title=f"Movie {i}", year=1900 + i) for i in range(1, 26)],
+        conflict_fields=["id"],
+    )
+
+    class MovieV2(Model):
+        table_name: ClassVar[str] = MovieV1.table_name
+        id: int | None = Field(default=None, json_schema_extra={"primary_key": True})
+        title: str = Field(json_schema_extra={"unique": True})
+        budget: decimal.Decimal = decimal.Decimal("10.5")
+
+    progress: list[tuple[int, int]] = []
+    migration = Migration(
+        MovieV2, batch_size=10, progress=lambda *args: progress.append(args)
+    )
+    assert migration.diff.removed == ["year"]
+    assert migration.diff.changed == ["title"]
+    migration.run()
+    assert progress == [(10, 25), (20, 25), (25, 25)]
+    assert column_names(db_connection) == ["id", "title", "budget"]
+    movie = MovieV2.get(id=25)
+    assert (movie.title, movie.budget) == ("Movie 25", decimal.Decimal("10.5"))
+    tables = db_connection.execute("SELECT name FROM sqlite_master").fetchall()
+    assert not [name for (name,) in tables if name.startswith("_pyorm_new")]
+    assert diff_model(MovieV2, Database.get_backend()).is_empty
+
+
+def test_rebuild_requires_default_for_not_null(db_connection: Connection):
+    MovieV1.create_model()
+
+    class MovieV2(MovieV1):
+        title: str = Field(json_schema_extra={"unique": True})
+        rating: int
+
+    with pytest.raises(MigrationError):
+        Migration(MovieV2).run()
+    assert column_names(db_connection) == ["id", "title", "year"]
+
+
+def test_rebuild_over_duplicates_fails_without_losing_rows(
+    db_connection: Connection,
+):
+    MovieV1.create_model()
+    for title in ("dup", "dup", "other"):
+        MovieV1(title=title, year=2000).save()
+
+    class MovieV2(MovieV1):
+        title: str = Field(json_schema_extra={"unique": True})
+
+    with pytest.raises(MigrationError):
+        Migration(MovieV2, batch_size=2).run()
+    assert [(m.id, m.title) for m in MovieV1.filter()] == [
+        (1, "dup"),
+        (2, "dup"),
+        (3, "other"),
+    ]
+    tables = db_connection.execute("SELECT name FROM sqlite_master").fetchall()
+    assert not [name for (name,) in tables if name.startswith("_pyorm_new")]
+    MovieV1(title="dup", year=2001).save()  # No mirror trigger is left behind
+
+
+def test_background_rebuild_mirrors_concurrent_writes(tmp_path: Path):
+    backend = SQLiteBackend(
+        str(tmp_path / "movies.db"), check_same_thread=False, profile="throughput"
+    )
+    Database.configure_database(backend)
+    MovieV1.create_model()
+    MovieV1.upsert(
+        [MovieV1(id=i, title=f"Movie {i}", year=1900) for i in range(1, 101)],
+        conflict_fields=["id"],
+    )
+
+    class MovieV2(MovieV1):
+        year: str
+
+    resume = threading.Event()
+    paused = threading.Event()
+
+    def progress(copied: int, total: int) -> None:
+        if copied == 10:
+            paused.set()
+            resume.wait()
+
+    migration = Migration(MovieV2, batch_size=10, progress=progress)
+    migration.start()
+    paused.wait()
+    # Writes to rows already copied and not yet copied while the copy runs
+    MovieV1(id=101, title="Movie 101", year=2000).save()
+    backend.update_item(MovieV1.table_name, {"title": "Changed"}, {"id": 5})
+    backend.update_item(MovieV1.table_name, {"title": "Changed"}, {"id": 50})
+    backend.delete_item(MovieV1.table_name, {"id": 6})
+    resume.set()
+    migration.wait()
+    assert migration.copied == 101  # Row 101 was inserted before its batch
+    movies = {movie.id: movie for movie in MovieV2.filter()}
+    assert len(movies) == 100
+    assert movies[101].year == "2000"
+    assert movies[5].title == movies[50].title == "Changed"
+    assert 6 not in movies
+
+
+def test_migrations_need_sqlite():
+    Database.configure_database(InMemoryBackend())
+    with pytest.raises(MigrationError):
+        Migration(MovieV1)
@@ -0,0 +1,149 @@
+import base64
+import decimal
+import json
+from typing import ClassVar
+
+import pytest
+from pydantic import Field
+
+from pyorm.backends.base import BaseBackend
+from pyorm.models import Model
+from pyorm.pagination import decode_cursor, encode_cursor
+
+
+class Article(Model):
+    table_name: ClassVar[str] = "test_article_pagination"
+    id: int | None = Field(default=None, json_schema_extra={"primary_key": True})
+    created: int
+    title: str
+    price: decimal.Decimal = decimal.Decimal("1.5")
+
+
+def create_articles(count: int) -> None:
+    Article.create_model()
+    Article.upsert(
+        [Article(id=i, created=i // 3, title=f"Article {i}") for i in range(count)],
+        conflict_fields=["id"],
+    )
+
+
+def test_filter_limit_and_order(backend: BaseBackend):
+    create_articles(10)
+    articles = Article.filter(_order_by=["-created", "-id"], _limit=4)
+    assert [a.id for a in articles] == [9, 8, 7, 6]
+
+
+def test_paginate_by_key(backend: BaseBackend):
+    create_articles(10)
+    seen = []
+    cursor = None
+    while True:
+        page = Article.paginate_by_key(("created", "id"), page_size=3, cursor=cursor)
+        seen.extend(article.id for article in page.items)
+        if not page.has_next:
+            break
+        cursor = page.next_cursor
+    assert seen == list(range(10))
+
+
+def test_paginate_descending_with_filters(backend: BaseBackend):
+    create_articles(10)
+    page = Article.paginate_by_key(("-price", "-id"), page_size=4)
+    assert [a.id for a in page.items] == [9, 8, 7, 6]
+    page = Article.paginate_by_key(
+        ("-price", "-id"), page_size=4, cursor=page.next_cursor
+    )
+    assert [a.id for a in page.items] == [5, 4, 3, 2]
+    page = Article.paginate_by_key(("id",), page_size=2, created=1)
+    assert [a.id for a in page.items] == [3, 4]
+    assert page.has_next
+
+
+def test_invalid_cursor(backend: BaseBackend):
+    create_articles(4)
+    page = Article.paginate_by_key(("created", "id"), page_size=2)
+    with pytest.raises(ValueError):
+        Article.paginate_by_key(("id",), page_size=2, cursor=page.next_cursor)
+    with pytest.raises(ValueError):
+        Article.paginate_by_key(("created", "-id"), page_size=2)
+
+
+def test_order_by_must_be_fields(backend: BaseBackend):
+    create_articles(4)
+    injected = "(SELECT CASE WHEN substr(title, 1, 1) = 'A' THEN 0 ELSE 1 END)"
+    with pytest.raises(ValueError):
+        Article.filter(_order_by=[injected])
+    with pytest.raises(ValueError):
+        Article.as_records(_order_by=["-" + injected])
+    with pytest.raises(ValueError):
+        Article.paginate_by_key((injected, "id"), page_size=2)
+
+
+def test_invalid_page_size_and_tampered_cursor(backend: BaseBackend):
+    create_articles(4)
+    for page_size in (0, -1):
+        with pytest.raises(ValueError):
+            Article.paginate_by_key(("id",), page_size=page_size)
+    payloads = [
+        [1, 2],
+        {"order_by": ["id"]},
+        {"order_by": ["id"], "values": 3},
+        {"order_by": ["id"], "values": [1, 2]},
+        {"order_by": ["id"], "values": ["not an id"]},
+    ]
+    for payload in payloads:
+        cursor = base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+        with pytest.raises(ValueError):
+            Article.paginate_by_key(("id",), page_size=2, cursor=cursor)
+    cursor = encode_cursor(["missing"], [1])
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, Article, ["missing"])
+
+
+def test_nullable_order_by_is_rejected(backend: BaseBackend):
+    class Player(Model):
+        table_name: ClassVar[str] = "test_player_pagination"
+        id: int | None = Field(default=None, json_schema_extra={"primary_key": True})
+        rank: int | None = None
+
+    Player.create_model()
+    Player.upsert(
+        [Player(id=i, rank=None if i % 3 == 0 else i) for i in range(10)], ["id"]
+    )
+    with pytest.raises(ValueError):
+        Player.paginate_by_key(("rank", "id"), page_size=3)
+    with pytest.raises(ValueError):
+        Player.paginate_by_key(("-rank", "-id"), page_size=3)
+    seen = []
+    cursor = None
+    while True:
+        page = Player.paginate_by_key(("id",), page_size=3, cursor=cursor)
+        seen.extend(player.id for player in page.items)
+        if not page.has_next:
+            break
+        cursor = page.next_cursor
+    assert seen == list(range(10))
+
+
+def test_seek_past_null_values(backend: BaseBackend):
+    class Player(Model):
+        table_name: ClassVar[str] = "test_player_seek"
+        id: int | None = Field(default=None, json_schema_extra={"primary_key": True})
+        rank: int | None = None
+
+    Player.create_model()
+    Player.upsert(
+        [Player(id=i, rank=None if i % 3 == 0 else i % 4) for i in range(10)], ["id"]
+    )
+
+    def ids_after(order_by: list[str], after: tuple) -> list[int]:
+        rows = backend.get_many(
+            Player.table_name, {}, ["id"], order_by=order_by, after=after
+        )
+        return [row["id"] for row in rows]
+
+    # Comparisons with a NULL are not true, as in SQL
+    assert ids_after(["rank", "id"], (None, 3)) == []
+    assert ids_after(["rank", "id"], (1, 4)) == [5, 2, 7]
+    assert ids_after(["-rank", "-id"], (2, 5)) == [2, 5, 1, 8, 4]
+    assert ids_after(["-id", "-rank"], (4, None)) == [3, 2, 1, 0]
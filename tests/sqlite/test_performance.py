@@ -1,9 +1,13 @@
+import tracemalloc
 from sqlite3 import Connection
 from typing import ClassVar
 
 import pytest
 from pydantic import Field
 
+from pyorm.backends.sqlite import SQLiteBackend
+from pyorm.buffer import WriteBuffer
+from pyorm.database import Database
 from pyorm.models import Model
 
 
@@ -15,17 +19,20 @@ class Movie(Model):
     score: float
 
 
+def insert_movie_rows(connection: Connection, count: int) -> None:
+    rows = [dict(title=f"Movie {i}", year=1900 + i, score=7.8) for i in range(count)]
+    connection.executemany(
+        f"INSERT INTO {Movie.table_name}(title, year, score) "
+        "VALUES(:title, :year, :score)",
+        rows,
+    )
+    connection.commit()
+
+
 @pytest.mark.parametrize("count", [10, 100, 1000])
 def test_raw_sql_select(benchmark, db_connection: Connection, count: int):
     Movie.create_model()
-    rows = []
-    for i in range(count):
-        rows.append(dict(title=f"Movie {i}", year=1900 + i, score=7.8))
-    db_connection.executemany(
-        "INSERT INTO test_movie_creation(title, year, score) VALUES(:title, :year, :score)",
-        rows,
-    )
-    db_connection.commit()
+    insert_movie_rows(db_connection, count)
 
     def raw_fetch():
         cursor = db_connection.execute("SELECT * FROM test_movie_creation")
@@ -38,14 +45,7 @@ def test_raw_sql_select(benchmark, db_connection: Connection, count: int):
 @pytest.mark.parametrize("count", [10, 100, 1000])
 def test_orm_select_all(benchmark, db_connection: Connection, count: int):
     Movie.create_model()
-    rows = []
-    for i in range(count):
-        rows.append(dict(title=f"Movie {i}", year=1900 + i, score=7.8))
-    db_connection.executemany(
-        "INSERT INTO test_movie_creation(title, year, score) VALUES(:title, :year, :score)",
-        rows,
-    )
-    db_connection.commit()
+    insert_movie_rows(db_connection, count)
 
     def fetch_all():
         return list(Movie.filter())
@@ -54,6 +54,36 @@ def test_orm_select_all(benchmark, db_connection: Connection, count: int):
     assert len(results) == count
 
 
+@pytest.mark.parametrize("count", [10, 100, 1000])
+def test_orm_select_records(benchmark, db_connection: Connection, count: int):
+    Movie.create_model()
+    insert_movie_rows(db_connection, count)
+
+    def fetch_records():
+        return Movie.as_records()
+
+    results = benchmark(fetch_records)
+    assert len(results) == count
+
+
+@pytest.mark.parametrize("mode", ["models", "records"])
+def test_memory_per_row(benchmark, db_connection: Connection, mode: str):
+    count = 1000
+    Movie.create_model()
+    insert_movie_rows(db_connection, count)
+    fetch = Movie.filter if mode == "models" else Movie.as_records
+    fetch()  # Warm up cached classes so they aren't measured
+
+    tracemalloc.start()
+    results = fetch()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    benchmark.extra_info["bytes_per_row"] = retained / count
+
+    benchmark(fetch)
+    assert len(results) == count
+
+
 @pytest.mark.parametrize("count", [10, 100, 1000])
 def test_orm_insert(benchmark, count):
     Movie.create_model()
@@ -65,6 +95,20 @@ def test_orm_insert(benchmark, count):
     benchmark(insert_users)
 
 
+@pytest.mark.parametrize("count", [10, 100, 1000])
+def test_orm_buffered_insert(benchmark, tmp_path, count):
+    backend = SQLiteBackend(str(tmp_path / "movies.db"), check_same_thread=False)
+    Database.configure_database(backend)
+    Movie.create_model()
+
+    def insert_movies():
+        with WriteBuffer(Movie).attach():
+            for i in range(count):
+                Movie(title=f"Movie {i}", year=1900 + i, score=7.8).save()
+
+    benchmark(insert_movies)
+
+
 @pytest.mark.parametrize("count", [10, 100, 1000])
 def test_raw_sql_insert(benchmark, db_connection: Connection, count):
     Movie.create_model()
@@ -78,3 +122,60 @@ def test_raw_sql_insert(benchmark, db_connection: Connection, count):
             db_connection.commit()
 
     benchmark(raw_insert)
+
+
+@pytest.mark.parametrize("profile", [None, "durable", "throughput", "bulk_load"])
+def test_orm_insert_profile(benchmark, tmp_path, profile):
+    backend = SQLiteBackend(str(tmp_path / "movies.db"), profile=profile)
+    Database.configure_database(backend)
+    Movie.create_model()
+
+    def insert_movies():
+        for i in range(100):
+            Movie(title=f"Movie {i}", year=1900 + i, score=7.8).save()
+
+    benchmark(insert_movies)
+
+
+@pytest.mark.parametrize("profile", [None, "durable", "throughput", "bulk_load"])
+def test_orm_select_profile(benchmark, tmp_path, profile):
+    backend = SQLiteBackend(str(tmp_path / "movies.db"), profile=profile)
+    Database.configure_database(backend)
+    Movie.create_model()
+    Movie.upsert(
+        [
+            Movie(id=i, title=f"Movie {i}", year=1900 + i, score=7.8)
+            for i in range(1000)
+        ],
+        conflict_fields=["id"],
+    )
+
+    def fetch_all():
+        return Movie.filter()
+
+    results = benchmark(fetch_all)
+    assert len(results) == 1000
+
+
+@pytest.mark.parametrize("load_into_memory", [False, True])
+def test_orm_select_loaded_into_memory(benchmark, tmp_path, load_into_memory):
+    path = str(tmp_path / "movies.db")
+    Database.configure_database(SQLiteBackend(path))
+    Movie.create_model()
+    Movie.upsert(
+        [
+            Movie(id=i, title=f"Movie {i}", year=1900 + i, score=7.8)
+            for i in range(1000)
+        ],
+        conflict_fields=["id"],
+    )
+    backend = SQLiteBackend(path, load_into_memory=load_into_memory)
+    Database.configure_database(backend)
+    benchmark.extra_info.update(backend.get_memory_footprint()._asdict())
+
+    def fetch_movies():
+        return [Movie.get(id=i) for i in range(0, 1000, 10)]
+
+    results = benchmark(fetch_movies)
+    assert len(results) == 100
+    backend.close()
@@ -0,0 +1,65 @@
+from pathlib import Path
+from typing import ClassVar
+
+import pytest
+
+from pyorm.backends.sqlite import SQLiteBackend, SQLiteProfile
+from pyorm.database import Database
+from pyorm.models import Model
+
+
+class Movie(Model):
+    table_name: ClassVar[str] = "test_movie_profiles"
+    title: str
+
+
+def test_default_profile_keeps_sqlite_defaults(tmp_path: Path):
+    backend = SQLiteBackend(str(tmp_path / "movies.db"))
+    assert backend.get_pragmas(["journal_mode", "synchronous"]) == {
+        "journal_mode": "delete",
+        "synchronous": 2,
+    }
+
+
+def test_profile_preset(tmp_path: Path):
+    backend = SQLiteBackend(str(tmp_path / "movies.db"), profile="throughput")
+    assert backend.get_pragmas(
+        ["journal_mode", "synchronous", "temp_store", "busy_timeout"]
+    ) == {
+        "journal_mode": "wal",
+        "synchronous": 1,
+        "temp_store": 2,
+        "busy_timeout": 5000,
+    }
+    # Every new connection gets the profile too
+    connection = backend.connect()
+    assert connection.execute("PRAGMA synchronous").fetchone()[0] == 1
+
+
+def test_custom_profile(tmp_path: Path):
+    profile = SQLiteProfile(page_size=8192, cache_size=-2000)
+    backend = SQLiteBackend(str(tmp_path / "movies.db"), profile=profile)
+    assert backend.get_pragmas(["page_size", "cache_size"]) == {
+        "page_size": 8192,
+        "cache_size": -2000,
+    }
+    with pytest.raises(ValueError):
+        SQLiteBackend(str(tmp_path / "movies.db"), profile="unknown")
+
+
+def test_bulk_load_restores_settings(tmp_path: Path):
+    backend = SQLiteBackend(str(tmp_path / "movies.db"), profile="durable")
+    Database.configure_database(backend)
+    Movie.create_model()
+    with backend.bulk_load():
+        assert backend.get_pragmas(["journal_mode", "synchronous"]) == {
+            "journal_mode": "memory",
+            "synchronous": 0,
+        }
+        for i in range(100):
+            Movie(title=f"Movie {i}").save()
+    assert backend.get_pragmas(["journal_mode", "synchronous"]) == {
+        "journal_mode": "wal",
+        "synchronous": 2,
+    }
+    assert len(Movie.filter()) == 100
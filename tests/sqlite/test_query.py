@@ -5,6 +5,8 @@ from typing import ClassVar
 import pytest
 from pydantic import Field
 
+from pyorm.backends.base import BaseBackend
+from pyorm.backends.sqlite import SQLiteBackend
 from pyorm.models import Model
 
 
@@ -74,14 +76,18 @@ def test_create_table(db_connection: Connection):
     assert column_map["budget"][3] == 1  # NOT NULL
 
 
-def test_drop_table(db_connection: Connection):
+def test_drop_table(backend: BaseBackend):
 
     class Movie(Model):
         table_name: ClassVar[str] = "test_movie_creation"
         title: str
 
+    Movie.create_model()
     Movie.drop_model()
-    cursor = db_connection.cursor()
+    if not isinstance(backend, SQLiteBackend):
+        assert Movie.table_name not in backend.tables
+        return
+    cursor = backend.get_connection().cursor()
 
     # Verify table exists
     cursor.execute(
@@ -91,7 +97,7 @@ def test_drop_table(db_connection: Connection):
     assert cursor.fetchone() is None
 
 
-def test_insert_table(db_connection: Connection):
+def test_insert_table(backend: BaseBackend):
     class Movie(Model):
         table_name: ClassVar[str] = "order"
         title: str
@@ -116,7 +122,19 @@ def test_insert_table(db_connection: Connection):
     assert m1.score == 7.8
     assert m1.id is not None
     assert m1.budget == decimal.Decimal("500")
-    cursor = db_connection.cursor()
+    m2 = Movie(
+        title="Movie title 2",
+        year=1997,
+        score=7.8,
+        is_published=False,
+        budget=decimal.Decimal("500"),
+    )
+    m2.save()
+    assert Movie.get(id=m1.id) == m1
+    assert Movie.get(id=m2.id).is_published is False
+    if not isinstance(backend, SQLiteBackend):
+        return
+    cursor = backend.get_connection().cursor()
     cursor.execute(
         "SELECT id, title, year, score, is_published FROM 'order' where id = ?",
         (m1.id,),
@@ -128,14 +146,6 @@ def test_insert_table(db_connection: Connection):
     assert year == m1.year
     assert score == m1.score
     assert is_published == 1
-    m2 = Movie(
-        title="Movie title 2",
-        year=1997,
-        score=7.8,
-        is_published=False,
-        budget=decimal.Decimal("500"),
-    )
-    m2.save()
     cursor.execute(
         "SELECT id, title, year, score, is_published FROM 'order' where id = ?",
         (m2.id,),
@@ -145,7 +155,7 @@ def test_insert_table(db_connection: Connection):
     assert is_published == 0
 
 
-def test_select_many(db_connection: Connection):
+def test_select_many(backend: BaseBackend):
     class Movie(Model):
         table_name: ClassVar[str] = "test_movie_creation"
         title: str
@@ -206,7 +216,7 @@ def test_select_many(db_connection: Connection):
     assert len(movies) == 0
 
 
-def test_get(db_connection: Connection):
+def test_get(backend: BaseBackend):
     class Movie(Model):
         table_name: ClassVar[str] = "test_movie_creation"
         title: str
@@ -231,7 +241,7 @@ def test_get(db_connection: Connection):
         Movie.get(year=1997)
 
 
-def test_update(db_connection: Connection):
+def test_update(backend: BaseBackend):
     class Movie(Model):
         table_name: ClassVar[str] = "test_movie_creation"
         title: str
@@ -287,7 +297,7 @@ def test_update(db_connection: Connection):
     m1.save()
 
 
-def test_update_without_pk(db_connection: Connection):
+def test_update_without_pk(backend: BaseBackend):
     class Movie(Model):
         table_name: ClassVar[str] = "test_movie_creation"
         title: str
@@ -313,7 +323,7 @@ def test_update_without_pk(db_connection: Connection):
     assert Movie.get(title="Movie 1")
 
 
-def test_delete_item(db_connection: Connection):
+def test_delete_item(backend: BaseBackend):
     class Movie(Model):
         table_name: ClassVar[str] = "test_movie_creation"
         title: str
@@ -333,15 +343,13 @@ def test_delete_item(db_connection: Connection):
         budget=decimal.Decimal("500"),
     )
     m1.save()
-    cursor = db_connection.cursor()
-    cursor.execute(
-        "SELECT id FROM test_movie_creation where id = ?",
-        (m1.id,),
-    )
-    result = cursor.fetchone()
-    assert len(result) == 1
-    assert result[0] == m1.id
+    assert Movie.get(id=m1.id) == m1
     m1.delete()
+    with pytest.raises(Movie.DoesNotExist):
+        Movie.get(id=m1.id)
+    if not isinstance(backend, SQLiteBackend):
+        return
+    cursor = backend.get_connection().cursor()
     cursor.execute(
         "SELECT id FROM test_movie_creation where id = ?",
         (m1.id,),
@@ -350,7 +358,7 @@ def test_delete_item(db_connection: Connection):
     assert result is None
 
 
-def test_delete_item_without_pk(db_connection: Connection):
+def test_delete_item_without_pk(backend: BaseBackend):
 
     class Movie(Model):
         table_name: ClassVar[str] = "test_movie_creation"
@@ -370,15 +378,12 @@ def test_delete_item_without_pk(db_connection: Connection):
         budget=decimal.Decimal("500.01"),
     )
     m1.save()
-    cursor = db_connection.cursor()
-    cursor.execute(
-        "SELECT title FROM test_movie_creation where title = ?",
-        (m1.title,),
-    )
-    result = cursor.fetchone()
-    assert len(result) == 1
-    assert result[0] == m1.title
+    assert Movie.get(title=m1.title) == m1
     m1.delete()
+    assert Movie.filter(title=m1.title) == []
+    if not isinstance(backend, SQLiteBackend):
+        return
+    cursor = backend.get_connection().cursor()
     cursor.execute(
         "SELECT title FROM test_movie_creation where title = ?",
         (m1.title,),
@@ -0,0 +1,57 @@
+from typing import ClassVar
+
+import pytest
+from pydantic import Field
+
+from pyorm.backends.base import BaseBackend
+from pyorm.models import Model
+from pyorm.records import Record
+
+
+class Movie(Model):
+    table_name: ClassVar[str] = "test_movie_records"
+    id: int | None = Field(default=None, json_schema_extra={"primary_key": True})
+    title: str
+    year: int
+
+
+def test_as_records(backend: BaseBackend):
+    Movie.create_model()
+    Movie(title="Movie 1", year=1997).save()
+    Movie(title="Movie 2", year=1998).save()
+    records = Movie.as_records(_order_by=["-year"])
+    assert len(records) == 2
+    record = records[0]
+    assert isinstance(record, Record)
+    assert (record.id, record.title, record.year) == (2, "Movie 2", 1998)
+    assert not hasattr(record, "__dict__")
+    with pytest.raises(AttributeError):
+        record.title = "Changed"  # type: ignore[misc]
+    movie = record.to_model()
+    assert isinstance(movie, Movie)
+    assert movie == Movie.get(id=2)
+    assert [r.title for r in Movie.as_records(year=1997)] == ["Movie 1"]
+
+
+def test_record_class_per_model(backend: BaseBackend):
+    class Book(Model):
+        table_name: ClassVar[str] = "test_book_records"
+        title: str
+
+    assert Movie.record_class() is Movie.record_class()
+    assert Book.record_class() is not Movie.record_class()
+    assert Book.record_class()._fields == ("title",)
+
+
+def test_fields_named_like_record_attributes(backend: BaseBackend):
+    class Car(Model):
+        table_name: ClassVar[str] = "test_car_records"
+        make: str
+        model: str
+        to_model: str
+
+    Car.create_model()
+    Car(make="Ford", model="T", to_model="kit").save()
+    record = Car.as_records()[0]
+    assert (record.make, record.model, record.to_model) == ("Ford", "T", "kit")
+    assert record._to_model() == Car(make="Ford", model="T", to_model="kit")
@@ -0,0 +1,104 @@
+from sqlite3 import Connection
+from typing import ClassVar
+
+import pytest
+from pydantic import Field
+
+from pyorm.migrations import migrate
+from pyorm.models import Model
+
+
+class Article(Model):
+    table_name: ClassVar[str] = "test_article_search"
+    id: int | None = Field(default=None, json_schema_extra={"primary_key": True})
+    title: str = Field(json_schema_extra={"fts": True})
+    body: str = Field(json_schema_extra={"fts": True})
+    year: int
+
+
+def create_articles() -> None:
+    Article.create_model()
+    Article(
+        title="SQLite internals", body="SQLite pages, the SQLite b-tree", year=2020
+    ).save()
+    Article(title="Cooking", body="Pasta with sqlite sauce", year=2021).save()
+    Article(title="Gardening", body="Tomatoes", year=2022).save()
+
+
+def test_search_ranked(db_connection: Connection):
+    create_articles()
+    articles = Article.search("sqlite")
+    assert [a.title for a in articles] == ["SQLite internals", "Cooking"]
+    assert isinstance(articles[0], Article)
+    assert [a.id for a in Article.search("sqlite", _limit=1)] == [1]
+    assert [a.id for a in Article.search("title:cooking", rank=False)] == [2]
+    assert Article.search("nothing") == []
+
+
+def test_search_index_follows_writes(db_connection: Connection):
+    create_articles()
+    article = Article.get(title="Gardening")
+    article.body = "Tomatoes grown next to a sqlite database"
+    article.save()
+    Article.get(title="Cooking").delete()
+    assert {a.title for a in Article.search("sqlite")} == {
+        "SQLite internals",
+        "Gardening",
+    }
+    assert Article.search("pasta") == []
+
+
+def test_drop_model_drops_search_table(db_connection: Connection):
+    create_articles()
+    Article.drop_model()
+    tables = db_connection.execute("SELECT name FROM sqlite_master").fetchall()
+    assert not [name for (name,) in tables if name.startswith(Article.table_name)]
+
+
+def test_search_added_by_migration(db_connection: Connection):
+    class PlainArticle(Model):
+        table_name: ClassVar[str] = Article.table_name
+        id: int | None = Field(default=None, json_schema_extra={"primary_key": True})
+        title: str
+        body: str
+        year: int
+
+    PlainArticle.create_model()
+    PlainArticle(title="SQLite internals", body="Pages", year=2020).save()
+    with pytest.raises(ValueError):
+        PlainArticle.search("sqlite")
+    diff = migrate(Article)
+    assert diff.missing_search_index
+    assert [a.id for a in Article.search("sqlite")] == [1]
+
+
+@pytest.mark.parametrize("rebuild", [False, True])
+def test_search_fields_changed_by_migration(db_connection: Connection, rebuild):
+    class TitleArticle(Model):
+        table_name: ClassVar[str] = Article.table_name
+        id: int | None = Field(default=None, json_schema_extra={"primary_key": True})
+        title: str = Field(json_schema_extra={"fts": True})
+        body: str
+        year: int | None if rebuild else int
+
+    TitleArticle.create_model()
+    TitleArticle(title="Cooking", body="Pasta with sqlite sauce", year=2021).save()
+    assert TitleArticle.search("sqlite") == []
+    diff = migrate(Article)
+    assert diff.changed_search_index
+    assert diff.needs_rebuild is rebuild
+    Article(title="Gardening", body="Tomatoes and sqlite", year=2022).save()
+    assert {a.title for a in Article.search("sqlite")} == {"Cooking", "Gardening"}
+    assert migrate(Article).is_empty
+
+    class UnsearchedArticle(Model):
+        table_name: ClassVar[str] = Article.table_name
+        id: int | None = Field(default=None, json_schema_extra={"primary_key": True})
+        title: str
+        body: str
+        year: int
+
+    assert migrate(UnsearchedArticle).changed_search_index
+    UnsearchedArticle(title="Other", body="sqlite", year=2023).save()
+    tables = db_connection.execute("SELECT name FROM sqlite_master").fetchall()
+    assert not [name for (name,) in tables if name.endswith("_fts")]
@@ -0,0 +1,97 @@
+from sqlite3 import Connection
+from typing import ClassVar
+
+from pydantic import Field
+
+from pyorm.backends.base import BaseBackend
+from pyorm.backends.sqlite import SQLiteBackend
+from pyorm.models import Model
+
+
+class Event(Model):
+    table_name: ClassVar[str] = "test_event_upsert"
+    id: int | None = Field(default=None, json_schema_extra={"primary_key": True})
+    key: str = Field(json_schema_extra={"unique": True})
+    value: int
+    note: str | None = None
+
+
+def test_unique_constraint(db_connection: Connection):
+    Event.create_model()
+    cursor = db_connection.execute(f"PRAGMA index_list({Event.table_name})")
+    assert [index[2] for index in cursor.fetchall()] == [1]  # One unique index
+
+
+def test_upsert_batch(backend: BaseBackend):
+    Event.create_model()
+    Event(key="a", value=1, note="first").save()
+    events = Event.upsert(
+        [Event(key="a", value=10), Event(key="b", value=2)],
+        conflict_fields=["key"],
+        update_fields=["value"],
+    )
+    assert {(e.key, e.value, e.note) for e in events} == {
+        ("a", 10, "first"),
+        ("b", 2, None),
+    }
+    assert all(e.id is not None for e in events)
+    assert len(Event.filter()) == 2
+
+
+def test_upsert_do_nothing(backend: BaseBackend):
+    Event.create_model()
+    Event(key="a", value=1).save()
+    events = Event.upsert(
+        [Event(key="a", value=5), Event(key="c", value=3)],
+        conflict_fields=["key"],
+        update_fields=[],
+    )
+    assert [e.key for e in events] == ["c"]
+    assert Event.get(key="a").value == 1
+
+
+def test_upsert_many_batches(backend: BaseBackend):
+    Event.create_model()
+    if isinstance(backend, SQLiteBackend):
+        backend.get_connection().setlimit(10, 8)  # SQLITE_LIMIT_VARIABLE_NUMBER
+    events = Event.upsert(
+        [Event(key=str(i), value=i) for i in range(25)], conflict_fields=["key"]
+    )
+    assert len(events) == 25
+    assert len(Event.filter()) == 25
+
+
+def test_get_or_create(backend: BaseBackend):
+    Event.create_model()
+    event, created = Event.get_or_create(key="a", defaults={"value": 1})
+    assert created is True
+    assert event.value == 1
+    event, created = Event.get_or_create(key="a", defaults={"value": 2})
+    assert created is False
+    assert event.value == 1
+
+
+def test_update_or_create(backend: BaseBackend):
+    Event.create_model()
+    event = Event.update_or_create(key="a", defaults={"value": 1})
+    assert event.value == 1
+    event = Event.update_or_create(key="a", defaults={"value": 7})
+    assert event.value == 7
+    assert Event.get(key="a").id == event.id
+
+
+def test_upsert_keeps_existing_key(backend: BaseBackend):
+    Event.create_model()
+    event = Event(key="a", value=1)
+    event.save()
+    events = Event.upsert([Event(key="a", value=5)], conflict_fields=["key"])
+    assert [(e.id, e.value) for e in events] == [(event.id, 5)]
+    assert Event.get(key="a").id == event.id
+
+
+def test_upsert_clears_nullable_fields(backend: BaseBackend):
+    Event.create_model()
+    Event(key="a", value=1, note="first").save()
+    events = Event.upsert([Event(key="a", value=2, note=None)], conflict_fields=["key"])
+    assert [(e.value, e.note) for e in events] == [(2, None)]
+    assert Event.get(key="a").note is None